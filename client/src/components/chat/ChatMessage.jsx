@@ -4,6 +4,16 @@ import { motion } from 'framer-motion';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 
+// Status shown while a streamed response is still running
+const STAGE_LABELS = {
+    rephrased: () => 'Understanding your question',
+    intent: () => 'Working out what you need',
+    sql: () => 'Running SQL query',
+    query: () => 'Preparing search',
+    search: () => 'Searching candidates',
+    rows: (data) => (data.count != null ? `Fetched ${data.count} rows` : 'Fetched results'),
+};
+
 const ChatMessage = React.memo(({ message, isLoading, onFollowup }) => {
     const isUser = message.type === 'user';
     const isSystem = message.type === 'system';
@@ -86,6 +96,9 @@ const ChatMessage = React.memo(({ message, isLoading, onFollowup }) => {
                         <span className="loading-dot">.</span>
                         <span className="loading-dot delay-100">.</span>
                         <span className="loading-dot delay-200">.</span>
+                        {message.stage && STAGE_LABELS[message.stage] && (
+                            <span className="ml-2 text-sm text-[#808080]">{STAGE_LABELS[message.stage](message.stageData || {})}</span>
+                        )}
                     </div>
                 ) : (
                     renderContent(message.content)
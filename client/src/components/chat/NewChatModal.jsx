@@ -4,11 +4,17 @@ import { Typewriter } from 'react-simple-typewriter';
 import PropTypes from 'prop-types';
 import { useState } from 'react';
 
+const formatEta = (seconds) => {
+    if (seconds < 60) return `${Math.ceil(seconds)}s`;
+    return `${Math.floor(seconds / 60)}m ${Math.ceil(seconds % 60)}s`;
+};
+
 const NewChatModal = ({
     isOpen,
     onClose,
     onCreate,
     isProcessing,
+    ingestionProgress,
     roleName,
     setRoleName,
     jdFile,
@@ -204,6 +210,17 @@ const NewChatModal = ({
                                                     loop={true}
                                                 />
                                             </h3>
+                                            {ingestionProgress && ingestionProgress.total > 0 && (
+                                                <div className="text-sm text-[#808080] space-y-1">
+                                                    <p>
+                                                        {ingestionProgress.processed + ingestionProgress.failed} / {ingestionProgress.total} candidates processed
+                                                        {ingestionProgress.failed > 0 && ` (${ingestionProgress.failed} failed)`}
+                                                    </p>
+                                                    {ingestionProgress.eta_seconds != null && (
+                                                        <p>About {formatEta(ingestionProgress.eta_seconds)} remaining</p>
+                                                    )}
+                                                </div>
+                                            )}
                                         </div>
                                     </div>
                                 </motion.div>
@@ -327,6 +344,7 @@ NewChatModal.propTypes = {
   onClose: PropTypes.func.isRequired,
   onCreate: PropTypes.func.isRequired,
   isProcessing: PropTypes.bool.isRequired,
+  ingestionProgress: PropTypes.object,
   roleName: PropTypes.string.isRequired,
   setRoleName: PropTypes.func.isRequired,
   jdFile: PropTypes.object,
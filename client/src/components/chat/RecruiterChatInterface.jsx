@@ -18,6 +18,7 @@ const RecruiterChatInterface = () => {
     activeChat,
     showNewChatModal,
     isProcessing,
+    ingestionProgress,
     roleName,
     jdFile,
     candidatesFile,
@@ -297,6 +298,7 @@ const RecruiterChatInterface = () => {
           createNewChat(opts);
         }}
         isProcessing={isProcessing}
+        ingestionProgress={ingestionProgress}
         roleName={roleName}
         setRoleName={setRoleName}
         jdFile={jdFile}
@@ -1,5 +1,5 @@
 import { useState, useRef, useEffect } from 'react';
-import { createNewChat, sendChatMessage, getTables, getChatHistory, sendGlobalChatMessage } from '../services/api';
+import { createNewChat, waitForIngestionJob, streamChatMessage, getTables, getChatHistory, streamGlobalChatMessage } from '../services/api';
 import { generateTableName } from '../config/constants';
 import { toast } from 'sonner';
 import posthog from 'posthog-js';
@@ -9,6 +9,7 @@ export const useChat = () => {
   const [activeChat, setActiveChat] = useState(null);
   const [showNewChatModal, setShowNewChatModal] = useState(false);
   const [isProcessing, setIsProcessing] = useState(false);
+  const [ingestionProgress, setIngestionProgress] = useState(null);
   const [message, setMessage] = useState('');
   const messagesEndRef = useRef(null);
 
@@ -175,7 +176,9 @@ export const useChat = () => {
       duration: 3000
     });
     try {
-      const result = await createNewChat(candidatesFile, jdFile, tableName);
+      const { job_id } = await createNewChat(candidatesFile, jdFile, tableName);
+      const job = await waitForIngestionJob(job_id, setIngestionProgress);
+      const result = job.result;
       const newChat = {
         id: Date.now(),
         title: roleName,
@@ -205,15 +208,41 @@ export const useChat = () => {
       });
     } finally {
       setIsProcessing(false);
+      setIngestionProgress(null);
       setRoleName('');
       setJdFile(null);
       setCandidatesFile(null);
     }
   };
 
+  // Applies a patch to one message of a chat while its response streams in
+  const patchMessage = (chatId, messageId, patch) => {
+    const apply = (chat) => (chat && chat.id === chatId ? {
+      ...chat,
+      messages: chat.messages.map(msg => (msg.id === messageId ? { ...msg, ...patch(msg) } : msg)),
+    } : chat);
+    setChats(prev => prev.map(apply));
+    setActiveChat(prev => apply(prev));
+  };
+
+  // Stage events update the status line, answer tokens are appended as they
+  // arrive (a reset drops text the agent streamed before calling a tool) and
+  // follow-ups are attached once they trail the answer
+  const streamHandler = (chatId, messageId) => (event, data) => {
+    if (event === 'token') {
+      patchMessage(chatId, messageId, msg => ({ content: (msg.content || '') + data.text, isLoading: false }));
+    } else if (event === 'reset') {
+      patchMessage(chatId, messageId, () => ({ content: '', isLoading: true }));
+    } else if (event === 'followups') {
+      patchMessage(chatId, messageId, () => ({ followups: data.followups }));
+    } else if (event !== 'result') {
+      patchMessage(chatId, messageId, () => ({ stage: event, stageData: data }));
+    }
+  };
+
   const sendMessage = async (messageText) => {
     if (!messageText.trim() || !activeChat || !activeChat.processed) return;
-    // If global chat, use sendGlobalChatMessage
+    // If global chat, use streamGlobalChatMessage
     if (activeChat.type === 'global') {
       const userMessage = {
         id: `user-${Date.now()}-${Math.random()}`,
@@ -252,7 +281,11 @@ export const useChat = () => {
           }, [])
           .slice(-5); // Keep only last 5 pairs
 
-        const response = await sendGlobalChatMessage(messageText, chatContext);
+        const response = await streamGlobalChatMessage(
+          messageText,
+          chatContext,
+          streamHandler(activeChat.id, loadingMessage.id)
+        );
         const aiMessage = {
           id: loadingMessage.id,
           type: 'ai',
@@ -307,25 +340,22 @@ export const useChat = () => {
     ));
     setActiveChat(updatedChat);
     try {
-        const response = await sendChatMessage(activeChat.tableName, messageText);
-        // response: { result, followups }
-        const aiMessage = {
-            id: loadingMessage.id,
-            type: 'ai',
+        const response = await streamChatMessage(
+            activeChat.tableName,
+            messageText,
+            streamHandler(activeChat.id, loadingMessage.id)
+        );
+        // response: { result, message_id }; follow-ups arrive later as a
+        // trailing stream event, so keep any the message already has
+        patchMessage(activeChat.id, loadingMessage.id, msg => ({
             content: response.result,
-            followups: response.followups,
+            messageId: response.message_id,
+            followups: msg.followups,
+            stage: null,
             isLoading: false,
             timestamp: new Date().toLocaleTimeString()
-        };
-        const finalChat = {
-            ...updatedChat,
-            messages: [...updatedChat.messages.slice(0, -1), aiMessage]
-        };
-        setChats(prev => prev.map(chat => 
-            chat.id === activeChat.id ? finalChat : chat
-        ));
-        setActiveChat(finalChat);
-        return response.followups;
+        }));
+        return response.message_id;
     } catch (error) {
         console.error('Failed to get response:', error);
         // Remove loading message on error
@@ -346,6 +376,7 @@ export const useChat = () => {
     activeChat,
     showNewChatModal,
     isProcessing,
+    ingestionProgress,
     message,
     roleName,
     jdFile,
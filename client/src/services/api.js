@@ -33,40 +33,112 @@ export const createNewChat = async (candidatesFile, jdFile, tableName) => {
             throw new Error('Failed to create new chat');
         }
 
+        // { job_id, status } - ingestion continues in the background
         const data = await response.json();
-        return data.result;
+        return data;
     } catch (error) {
         console.error('Error creating new chat:', error);
         throw error;
     }
 };
 
-export const sendChatMessage = async (tableName, query) => {
+export const getIngestionJob = async (jobId) => {
     try {
-        const response = await fetch(`${BACKEND_URL}/chat`, {
-            method: 'POST',
+        const response = await fetch(`${BACKEND_URL}/jobs/${encodeURIComponent(jobId)}`, {
+            method: 'GET',
             headers: {
                 ...commonHeaders,
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ tableName, query, user_id: localStorage.getItem('user_id') }),
             ...commonOptions,
         });
+
         if (!response.ok) {
-            throw new Error('Failed to send message');
+            throw new Error('Failed to get ingestion job status');
         }
-        const data = await response.json();
-        // Handle both {result, followups} and {result} (canned_response)
-        return {
-            result: data.result,
-            followups: data.followups
-        };
+
+        return await response.json();
     } catch (error) {
-        console.error('Error sending message:', error);
+        console.error('Error getting ingestion job status:', error);
         throw error;
     }
 };
 
+export const waitForIngestionJob = async (jobId, onProgress, intervalMs = 2000) => {
+    // Polls the job until it finishes, reporting every status update
+    for (;;) {
+        const job = await getIngestionJob(jobId);
+        if (onProgress) onProgress(job);
+        if (job.status === 'completed') return job;
+        if (job.status === 'failed') throw new Error(job.error || 'Ingestion failed');
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
+// POSTs to a streaming endpoint and dispatches its server-sent events to
+// onEvent(event, data); resolves with the data of the final "result" event
+const postEventStream = async (path, body, onEvent) => {
+    const response = await fetch(`${BACKEND_URL}${path}`, {
+        method: 'POST',
+        headers: {
+            ...commonHeaders,
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+        },
+        body: JSON.stringify({ ...body, stream: true }),
+        ...commonOptions,
+    });
+    if (!response.ok || !response.body) {
+        throw new Error('Failed to open response stream');
+    }
+
+    // Resolves with the "result" event; events that trail it (follow-ups) are
+    // still read and passed to onEvent after the promise has resolved
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    return new Promise((resolve, reject) => {
+        let buffer = '';
+        let result = null;
+        const read = async () => {
+            for (;;) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    for (const line of block.split('\n')) {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+                    if (event === 'error') throw new Error(payload.error || 'Stream failed');
+                    if (event === 'result') {
+                        result = payload;
+                        resolve(result);
+                    }
+                    if (onEvent) onEvent(event, payload);
+                }
+            }
+            if (!result) throw new Error('Stream ended without a result');
+        };
+        read().catch(error => {
+            if (result) console.error('Error reading trailing events:', error);
+            else reject(error);
+        });
+    });
+};
+
+export const streamChatMessage = (tableName, query, onEvent) =>
+    postEventStream('/chat', { tableName, query, user_id: localStorage.getItem('user_id') }, onEvent);
+
+export const streamGlobalChatMessage = (prompt, chatContext = [], onEvent) =>
+    postEventStream('/chat/2', { prompt, chat_context: chatContext }, onEvent);
+
 export const getTables = async () => {
     try {
         const response = await fetch(`${BACKEND_URL}/gettables`, {
@@ -152,23 +224,6 @@ export const getChatHistory = async (user_id, tableName) => {
     }
 };
 
-export const sendGlobalChatMessage = async (prompt, chatContext = []) => {
-    const response = await fetch(`${BACKEND_URL}/chat/2`, {
-        method: 'POST',
-        headers: {
-            ...commonHeaders,
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ 
-            prompt,
-            chat_context: chatContext
-        }),
-        ...commonOptions,
-    });
-    if (!response.ok) throw new Error('Failed to send global chat message');
-    return await response.json();
-};
-
 export const getJobDescription = async (tableName) => {
     try {
         const response = await fetch(`${BACKEND_URL}/get-job-description?tableName=${encodeURIComponent(tableName)}`, {
@@ -0,0 +1,140 @@
+"""
+Replays chat traffic against the Flask app and reports latency percentiles.
+
+Record the LLM responses once against the live provider, then replay them
+offline with a synthetic latency so runs are comparable:
+
+    LLM_BACKEND=record python -m benchmarks.chat_pipeline --table jobs_x
+    LLM_BACKEND=replay LLM_REPLAY_LATENCY=lognormal:0.8:0.4 \\
+        python -m benchmarks.chat_pipeline --table jobs_x --concurrency 8
+
+The workload is a JSON-lines file of {"path": "/chat" | "/chat/2", "body": {...}}
+requests; without --workload one /chat request per --query is sent.
+
+Prompts must not depend on earlier runs for a replay to find its recordings:
+every /chat request without a user_id in its body gets a fresh one, so no
+thread history or summary reaches the rephraser, and the LLM gateway cache
+and the SQL plan cache are turned off (LLM_CACHE_ENABLED and
+SQL_PLAN_CACHE_ENABLED, --keep-caches leaves them as configured). Requests
+sharing a user_id form a thread whose prompts depend on background summaries
+and are not reproducible.
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def load_workload(args):
+    if args.workload:
+        with open(args.workload) as workload:
+            return [json.loads(line) for line in workload if line.strip()]
+    return [
+        {"path": "/chat", "body": {"tableName": args.table, "query": query}}
+        for query in args.query
+    ]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stage_means(metrics_text):
+    """Mean seconds per (kind, stage) from the stage_duration_seconds series"""
+    sums, counts = {}, {}
+    for line in metrics_text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"stage_duration_seconds{suffix}{{"
+            if line.startswith(prefix):
+                labels, value = line[len(prefix) :].rsplit("} ", 1)
+                target[labels] = float(value)
+    return sorted(
+        ((sums[labels] / counts[labels], counts[labels], labels) for labels in sums),
+        reverse=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workload", help="JSON-lines file of requests")
+    parser.add_argument("--table", help="job table for the default /chat workload")
+    parser.add_argument(
+        "--keep-caches",
+        action="store_true",
+        help="leave the LLM and SQL plan caches on",
+    )
+    parser.add_argument(
+        "--query",
+        action="append",
+        default=None,
+        help="question for the default workload (repeatable)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    args.query = args.query or ["How many candidates are there?"]
+    if not args.workload and not args.table:
+        parser.error("--table is required without --workload")
+
+    if not args.keep_caches:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+        os.environ["SQL_PLAN_CACHE_ENABLED"] = "false"
+    os.environ["INGEST_AUTO_RESUME"] = "false"
+
+    # imported late so --help works without a configured environment; only
+    # the chat blueprint is mounted, nothing of app.py runs
+    from flask import Flask
+    from routes.chat_routes import chat_bp
+    from services.llm_gateway import llm_gateway
+
+    app = Flask(__name__)
+    app.register_blueprint(chat_bp)
+
+    workload = load_workload(args) * args.repeat
+    client = app.test_client()
+
+    def send(request):
+        body = dict(request["body"])
+        if request["path"] == "/chat":
+            body.setdefault("user_id", f"benchmark-{uuid.uuid4()}")
+        start = time.perf_counter()
+        response = client.post(request["path"], json=body)
+        return request["path"], response.status_code, time.perf_counter() - start
+
+    print(
+        f"{len(workload)} requests, concurrency {args.concurrency}, "
+        f"LLM backend {os.getenv('LLM_BACKEND', 'live')}\n"
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, workload))
+    elapsed = time.perf_counter() - started
+
+    print(f"{'path':<12}{'requests':>10}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for path in sorted({path for path, _, _ in results}):
+        latencies = [seconds for p, _, seconds in results if p == path]
+        errors = sum(1 for p, status, _ in results if p == path and status >= 400)
+        print(
+            f"{path:<12}{len(latencies):>10}{errors:>8}"
+            f"{percentile(latencies, 0.5):>9.3f}{percentile(latencies, 0.95):>9.3f}"
+            f"{percentile(latencies, 0.99):>9.3f}"
+        )
+    print(f"\n{len(results) / elapsed:.2f} requests/s over {elapsed:.2f}s")
+
+    print(f"\n{'mean s':>8}{'calls':>8}  stage")
+    for mean, count, labels in stage_means(client.get("/metrics").get_data(True)):
+        print(f"{mean:>8.3f}{count:>8.0f}  {labels}")
+
+    replay = llm_gateway.stats().get("replay")
+    if replay:
+        print(f"\nreplay: {replay}")
+
+
+if __name__ == "__main__":
+    main()
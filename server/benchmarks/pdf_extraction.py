@@ -0,0 +1,78 @@
+"""
+Compares the PDF text extraction backends on a local corpus.
+
+    python -m benchmarks.pdf_extraction --corpus temp --repeat 5
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from services.pdf_extractor import PdfExtractor, pymupdf
+
+
+def load_corpus(corpus_dir):
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "**", "*.pdf"), recursive=True))
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as pdf_file:
+            corpus.append((path, pdf_file.read()))
+    return corpus
+
+
+def run(extractor, corpus, repeat):
+    chars = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path, pdf_bytes in corpus:
+            try:
+                chars += len(extractor.extract_text(pdf_bytes))
+            except Exception as e:
+                print(f"  {os.path.basename(path)} failed: {e}")
+    elapsed = time.perf_counter() - started
+    return elapsed, chars // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default="temp", help="directory of PDFs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No PDFs found under {args.corpus}")
+    total_bytes = sum(len(pdf_bytes) for _, pdf_bytes in corpus)
+    print(f"{len(corpus)} PDFs, {total_bytes / 1024:.0f} KiB, {args.repeat} repeats\n")
+
+    variants = [("pypdf2", PdfExtractor(backend="pypdf2"))]
+    if pymupdf:
+        variants.append(("pymupdf", PdfExtractor(backend="pymupdf")))
+        variants.append(
+            (
+                f"pymupdf x{args.workers} pages",
+                PdfExtractor(
+                    backend="pymupdf", parallel_min_pages=1, max_workers=args.workers
+                ),
+            )
+        )
+    else:
+        print("PyMuPDF is not installed, only PyPDF2 is measured\n")
+
+    print(f"{'backend':<24}{'seconds':>10}{'ms/doc':>10}{'docs/s':>10}{'chars':>12}")
+    for name, extractor in variants:
+        if extractor.backend == "pymupdf" and extractor.parallel_min_pages == 1:
+            # spawn the page pool's workers so their start-up is not timed
+            run(extractor, corpus[:1], 1)
+        elapsed, chars = run(extractor, corpus, args.repeat)
+        docs = len(corpus) * args.repeat
+        print(
+            f"{name:<24}{elapsed:>10.3f}{elapsed / docs * 1000:>10.2f}"
+            f"{docs / elapsed:>10.1f}{chars:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,39 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from services.chat_service import ChatService
 from services.insights_service import InsightsService
+from services.chat_stream import stream_events
+from services.job_service import IngestionJobService
+from services.llm_gateway import llm_gateway
+from services.metrics import metrics
+from services.csv_intake import (
+    count_csv_rows,
+    iter_candidate_chunks,
+    validate_csv_header,
+)
+from services.pdf_extractor import PdfExtractor
 from services.peoples_api import PeoplesApi
 import os
 import pandas as pd
 from werkzeug.utils import secure_filename
-import tempfile
 import requests
-from PyPDF2 import PdfReader
 import sqlite3
 import json
+import threading
+import time
 import traceback
+import uuid
 
 chat_bp = Blueprint("chat", __name__)
 chat_service = ChatService()
 insights_service = InsightsService()
 peoples_api = PeoplesApi()
+ingestion_jobs = IngestionJobService()
+pdf_extractor = PdfExtractor()
+
+UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads")
+
+if not os.path.exists(UPLOAD_DIR):
+    os.makedirs(UPLOAD_DIR)
 
 
 @chat_bp.route("/insights", methods=["GET"])
@@ -54,18 +72,76 @@ def chat():
         if not table_name or not query:
             return jsonify({"error": "Missing tableName or query"}), 400
 
+        if _wants_stream(data):
+            return _sse_response(
+                lambda emit: _chat_payload(
+                    chat_service.process_query(table_name, query, user_id, emit=emit)
+                ),
+                then=_send_followups,
+            )
+
         result = chat_service.process_query(table_name, query, user_id)
         print("here with the rsult - ", result)
-        if "followups" in result:
-            return jsonify(
-                {"result": result["response"], "followups": result["followups"]}
-            )
-        if "canned_response" in result:
-            return jsonify({"result": result["canned_response"]})
+        return jsonify(_chat_payload(result))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _chat_payload(result):
+    if isinstance(result, dict) and "message_id" in result:
+        return {"result": result["response"], "message_id": result["message_id"]}
+    if isinstance(result, dict) and "canned_response" in result:
+        return {"result": result["canned_response"]}
+    return {"result": result}
+
+
+def _send_followups(payload, emit):
+    """Trailing "followups" event of a streamed /chat response"""
+    message_id = payload.get("message_id")
+    if not message_id:
+        return
+    followups = chat_service.get_followups(
+        message_id, timeout=float(os.getenv("FOLLOWUP_WAIT_SECONDS", 30))
+    )
+    emit("followups", {"message_id": message_id, **(followups or {})})
+
+
+@chat_bp.route("/chat/followups/<message_id>", methods=["GET"])
+def chat_followups(message_id):
+    """
+    Follow-up suggestions of a /chat answer. ?wait=<seconds> blocks until they
+    are ready (up to FOLLOWUP_WAIT_SECONDS); 202 while still generating.
+    """
+    try:
+        wait = min(
+            float(request.args.get("wait", 0)),
+            float(os.getenv("FOLLOWUP_WAIT_SECONDS", 30)),
+        )
+        followups = chat_service.get_followups(message_id, timeout=wait)
+        if followups is None:
+            return jsonify({"error": "Unknown message id"}), 404
+
+        status_code = 202 if followups["status"] == "pending" else 200
+        return jsonify({"message_id": message_id, **followups}), status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _wants_stream(data):
+    """Streaming is requested with "stream": true or Accept: text/event-stream"""
+    return bool(data.get("stream")) or "text/event-stream" in request.headers.get(
+        "Accept", ""
+    )
+
+
+def _sse_response(run, then=None):
+    return Response(
+        stream_events(run, then=then),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @chat_bp.route("/get-chats", methods=["GET"])
 def getChats():
     try:
@@ -111,33 +187,195 @@ def new_chat():
         if not table_name:
             return jsonify({"error": "Missing tableName"}), 400
 
-        temp_dir = tempfile.mkdtemp()
-        csv_path = os.path.join(temp_dir, secure_filename(csv_file.filename))
-        pdf_path = os.path.join(temp_dir, secure_filename(pdf_file.filename))
+        resume = request.form.get("resume", "false").lower() == "true"
 
+        # The CSV is streamed chunk by chunk by the background job and kept
+        # until the ingestion completes, so a failed run can be resumed; every
+        # upload gets its own file so a second upload cannot overwrite it
+        csv_path = os.path.join(
+            UPLOAD_DIR, f"{secure_filename(table_name)}_{uuid.uuid4()}.csv"
+        )
         csv_file.save(csv_path)
-        pdf_file.save(pdf_path)
 
-        df = pd.read_csv(csv_path)
-
-        pdf_reader = PdfReader(pdf_path)
-        jd_text = ""
-        for page in pdf_reader.pages:
-            jd_text += page.extract_text()
+        try:
+            validate_csv_header(csv_path)
+        except ValueError as e:
+            os.remove(csv_path)
+            return jsonify({"error": str(e)}), 400
 
-        result = chat_service.process_new_chat(df, jd_text, table_name)
+        jd_text = pdf_extractor.extract_text(pdf_file.read())
 
-        os.remove(csv_path)
-        os.remove(pdf_path)
-        os.rmdir(temp_dir)
+        job = ingestion_jobs.submit(
+            table_name, _ingest_csv, csv_path, jd_text, table_name, resume=resume
+        )
 
-        return jsonify({"result": result})
+        return jsonify({"job_id": job.job_id, "status": job.status}), 202
     except Exception as e:
         tb = traceback.format_exc()
         print(f"/newChat error: {tb}")
         return jsonify({"error": str(e), "traceback": tb}), 500
 
 
+@chat_bp.route("/appendCandidates", methods=["POST"])
+def append_candidates():
+    try:
+        if "csv" not in request.files:
+            return jsonify({"error": "Missing CSV file"}), 400
+
+        csv_file = request.files["csv"]
+        table_name = request.form.get("tableName")
+
+        if not table_name:
+            return jsonify({"error": "Missing tableName"}), 400
+
+        csv_path = os.path.join(
+            UPLOAD_DIR, f"{secure_filename(table_name)}_append_{uuid.uuid4()}.csv"
+        )
+        csv_file.save(csv_path)
+
+        try:
+            validate_csv_header(csv_path)
+        except ValueError as e:
+            os.remove(csv_path)
+            return jsonify({"error": str(e)}), 400
+
+        job = ingestion_jobs.submit(table_name, _append_csv, csv_path, table_name)
+
+        return jsonify({"job_id": job.job_id, "status": job.status}), 202
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"/appendCandidates error: {tb}")
+        return jsonify({"error": str(e), "traceback": tb}), 500
+
+
+@chat_bp.route("/newChat/resume", methods=["POST"])
+def resume_new_chat():
+    try:
+        data = request.get_json()
+        table_name = data.get("tableName")
+        if not table_name:
+            return jsonify({"error": "Missing tableName"}), 400
+
+        job = _resume_ingestion(table_name)
+        if not job:
+            return jsonify({"error": "No resumable ingestion for this table"}), 404
+
+        return jsonify({"job_id": job.job_id, "status": job.status}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _ingest_csv(csv_path, jd_text, table_name, resume=False, job=None):
+    job.set_rows(count_csv_rows(csv_path))
+    chunks = iter_candidate_chunks(csv_path, on_skipped=job.add_skipped)
+    result = chat_service.process_new_chat(
+        chunks, jd_text, table_name, job=job, resume=resume, csv_path=csv_path
+    )
+    os.remove(csv_path)
+    return result
+
+
+def _append_csv(csv_path, table_name, job=None):
+    job.set_rows(count_csv_rows(csv_path))
+    chunks = iter_candidate_chunks(csv_path, on_skipped=job.add_skipped)
+    result = chat_service.append_candidates(
+        chunks, table_name, job=job, csv_path=csv_path
+    )
+    os.remove(csv_path)
+    return result
+
+
+def _resume_ingestion(table_name, include_failed=True):
+    # claimed atomically, so concurrent callers resume a run at most once
+    run = chat_service.claim_ingestion_run(table_name, include_failed)
+    if not run:
+        return None
+
+    jd_text = None
+    if run["csv_path"] and os.path.exists(run["csv_path"]):
+        jd_text = chat_service.get_job_description_text(table_name)
+    if not jd_text:
+        chat_service.release_ingestion_run(table_name)
+        return None
+
+    return ingestion_jobs.submit(
+        table_name, _ingest_csv, run["csv_path"], jd_text, table_name, resume=True
+    )
+
+
+def resume_incomplete_ingestions():
+    """
+    Re-queues ingestions left running by a crash or deploy. Failed runs
+    would fail the same way again, they are left to /newChat/resume.
+    """
+    for run in chat_service.get_incomplete_ingestion_runs():
+        if run["table_name"] in {job.table_name for job in ingestion_jobs.list()}:
+            continue
+        try:
+            job = _resume_ingestion(run["table_name"], include_failed=False)
+            if job:
+                print(f"Resumed ingestion of {run['table_name']} as job {job.job_id}")
+        except Exception as e:
+            print(f"Could not resume ingestion of {run['table_name']}: {e}")
+
+
+_auto_resume_pending = os.getenv("INGEST_AUTO_RESUME", "false").lower() == "true"
+_auto_resume_lock = threading.Lock()
+
+
+@chat_bp.before_app_request
+def _auto_resume_ingestions():
+    # once per worker on its first request rather than at import, so scripts
+    # importing the app and the reloader's parent process never resume
+    global _auto_resume_pending
+    with _auto_resume_lock:
+        if not _auto_resume_pending:
+            return
+        _auto_resume_pending = False
+    threading.Thread(target=resume_incomplete_ingestions, daemon=True).start()
+
+
+@chat_bp.route("/jobs", methods=["GET"])
+def list_jobs():
+    try:
+        table_name = request.args.get("tableName")
+        jobs = ingestion_jobs.list(table_name)
+        return jsonify({"jobs": [job.to_dict() for job in jobs]})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@chat_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = ingestion_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@chat_bp.route("/jobs/<job_id>/events", methods=["GET"])
+def stream_job(job_id):
+    job = ingestion_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    interval = float(request.args.get("interval", 1))
+
+    def generate():
+        while True:
+            status = job.to_dict()
+            yield f"data: {json.dumps(status)}\n\n"
+            if status["status"] in ("completed", "failed"):
+                break
+            time.sleep(interval)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @chat_bp.route("/gettables", methods=["GET"])
 def get_tables():
     try:
@@ -147,6 +385,44 @@ def get_tables():
         return jsonify({"error": str(e)}), 500
 
 
+@chat_bp.route("/resume-cache/stats", methods=["GET"])
+def get_resume_cache_stats():
+    try:
+        return jsonify(chat_service.resume_cache.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@chat_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Per-stage latency, token and cost metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@chat_bp.route("/llm-cache/stats", methods=["GET"])
+def get_llm_cache_stats():
+    try:
+        return jsonify(llm_gateway.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@chat_bp.route("/sql-agents/stats", methods=["GET"])
+def get_sql_agent_stats():
+    try:
+        return jsonify(chat_service.sql_agents.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@chat_bp.route("/sql-plans/stats", methods=["GET"])
+def get_sql_plan_stats():
+    try:
+        return jsonify(chat_service.sql_plans.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @chat_bp.route("/get-job-description", methods=["GET"])
 def get_jobDesc():
     try:
@@ -166,174 +442,180 @@ def chat_to_elastic():
         if not prompt:
             return jsonify({"error": "Missing prompt"}), 400
 
-        # Build context from previous chats
-        context_string = ""
-        if chat_context and len(chat_context) > 0:
-            context_string = "\n\nPrevious conversation context:\n"
-            for i, chat in enumerate(chat_context[-5:], 1):  # Last 5 chats
-                if (
-                    isinstance(chat, dict)
-                    and "user_message" in chat
-                    and "assistant_message" in chat
-                ):
-                    context_string += f"{i}. User: {chat['user_message']}\n   Assistant: {chat['assistant_message']}\n"
-                elif isinstance(chat, dict) and "user" in chat and "assistant" in chat:
-                    context_string += f"{i}. User: {chat['user']}\n   Assistant: {chat['assistant']}\n"
-
-        # Person schema summary for Gemini
-
-        gemini_instruction = f"""
-        You are an expert at generating Elasticsearch queries for a specific API. Your task is to analyze the user's prompt and classify it into one of two categories: "Talent Search" or "Background Verification".
-
-        Based on the classification, generate a precise JSON Elasticsearch query using ONLY the structures provided below.
-
-        **1. Intent Classification:**
-        - **Talent Search**: User is looking for candidates with specific skills, experience, or location.
-        - **Background Verification**: User is searching for a specific person by name.
-
-        **2. Strict Query Generation Rules:**
-
-        **If "Talent Search", use this EXACT structure. Do not add other clauses:**
-        ```json
-        {{
-          "query": {{
-            "bool": {{
-              "must": [
-                {{ "term": {{ "location_locality": "mumbai" }} }},
-                {{ "range": {{ "inferred_years_experience": {{ "gte": 5 }} }} }},
-                {{
-                  "bool": {{
-                    "should": [
-                      {{ "match": {{ "job_title": "AI developer" }} }},
-                      {{ "match": {{ "skills": "artificial intelligence" }} }}
-                    ]
-                  }}
-                }}
-              ]
-            }}
-          }},
-          "size": 10
-        }}
-        ```
-
-        **If "Background Verification", use this EXACT structure:**
-        ```json
-        {{
-          "query": {{
-            "bool": {{
-              "must": [
-                {{ "match": {{ "first_name": "john" }} }},
-                {{ "match": {{ "last_name":"doe" }} }},
-              ]
-            }}
-          }},
-          "size": 1
-        }}
-        ```
-        
-        **CRITICAL INSTRUCTIONS:**
-        - Return **ONLY** the raw JSON query. No text, explanations, or markdown.
-        - **DO NOT** use any fields or clauses not present in the examples above. The `minimum_should_match` clause is **NOT SUPPORTED** and must not be used.
-        - Extract entities from the user's prompt (like location, skills, name) and place them into the templates.
-        
-        **Conversation Context:**
-        {context_string}
-
-        **Current User Prompt:**
-        "{prompt}"
-        """
-
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        import os
-        import json
-
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0,
-        )
-        response = llm.invoke(gemini_instruction)
-        content = response.content if hasattr(response, "content") else str(response)
-        if content.strip().startswith("```json"):
-            content = content.strip()[7:]
-        if content.strip().startswith("```"):
-            content = content.strip()[3:]
-        if content.strip().endswith("```"):
-            content = content.strip()[:-3]
-        content = content.strip()
-        try:
-            elastic_query = json.loads(content)
-        except Exception:
-            elastic_query = content  # Keep as string if not valid json
-
-        print("Generated Elasticsearch Query:", elastic_query)
-
-        # Call People Data Labs API with the elastic query
-        peoples_data = peoples_api.fetch_peoples_data(elastic_query)
-
-        print("peoples data - ", peoples_data)
-        # --- Enhanced Gemini summary for recruiter with LinkedIn/GitHub URLs ---
-        summary_prompt = f"""
-        You are an expert recruiter assistant. Given the following global talent data search results, create a comprehensive and well-structured response in markdown format.
-
-        Your response should include the following sections for each candidate:
-        
-        ## Candidate Profiles
-        For each person found, create a subsection using their actual name (e.g., ### John Doe). If no name is available, use "### Candidate [Number]". Then, list their details using bullet points with bolded labels.
-        
-        - **Name**: 
-        - **Current Role**:
-        - **Company**:
-        - **Location**:
-        - **Years of Experience**: (use 'inferred_years_experience' if available, otherwise calculate from experience)
-        - **Key Skills**: (list top 5-7 skills)
-        - **Contact**: (provide email if available, otherwise 'Not available')
-        - **Social Profiles**: 
-            - LinkedIn: [linkedin.com/in/username](https://linkedin.com/in/username)
-            - GitHub: [github.com/username](https://github.com/username)
-            - Twitter: [twitter.com/username](https://twitter.com/username)
-        - **Professional Links**:
-            - Company Website: [claravest.com](https://claravest.com)
-
-        ### Background Verification Report
-        This background verification report is based on publicly available information. For a comprehensive check, a third-party service is recommended.
-        
-        **Verification Process Overview:**
-        Our process involves cross-referencing information from professional networks like LinkedIn and code repositories like GitHub. We check for:
-        1.  **Work History Consistency**: Comparing roles and timelines on LinkedIn with resume data.
-        2.  **Technical Skills Validation**: Reviewing public activity on GitHub for evidence of claimed skills.
-        3.  **Online Presence Check**: A general search for any public information that might be relevant.
-
-        **Candidate-Specific Findings:**
-        - **LinkedIn Profile**: [Provide a brief analysis of the candidate's LinkedIn. Mention if it appears professional and consistent. e.g., "John Doe's LinkedIn profile is comprehensive and aligns with typical roles in their field."]
-        - **GitHub Activity**: [Analyze their GitHub profile. e.g., "The GitHub profile shows activity in repositories related to Python and Machine Learning, supporting their listed skills." or "No public GitHub profile was found."]
-        - **Overall Assessment**: [Give a summary. e.g., "Based on public profiles, the candidate presents a consistent and professional online presence. Further verification is recommended."]
-
-        **IMPORTANT FORMATTING RULES:**
-        - Always use proper markdown syntax
-        - Use ### for candidate names and the 'Background Verification Report' section.
-        - Use ** for bold labels
-        - Use - for bullet points
-        - Ensure all links are properly formatted as markdown links
-        - If the data is empty, simply state: "No candidates found matching your criteria."
-
-        Data:
-        {json.dumps(peoples_data)}
-        """
-        summary_llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0.2,
-        )
-        summary_response = summary_llm.invoke(summary_prompt)
-        summary_content = (
-            summary_response.content
-            if hasattr(summary_response, "content")
-            else str(summary_response)
-        )
+        if _wants_stream(data):
+            return _sse_response(lambda emit: _global_chat(prompt, chat_context, emit))
 
-        return jsonify({"summary": summary_content, "raw": peoples_data})
+        return jsonify(_global_chat(prompt, chat_context))
     except Exception as e:
         tb = traceback.format_exc()
         print(f"/chat/2 error: {tb}")
         return jsonify({"error": str(e), "traceback": tb}), 500
+
+
+def _global_chat(prompt, chat_context, emit=None):
+    """
+    Global talent search: Gemini turns the prompt into a People Data Labs
+    Elasticsearch query, PDL runs it and Gemini summarises the profiles.
+    emit(event, data), when given, receives the stage events and summary
+    tokens of a streaming response.
+    """
+    streaming = emit is not None
+    emit = emit or (lambda event, data=None: None)
+
+    # Build context from previous chats
+    context_string = ""
+    if chat_context and len(chat_context) > 0:
+        context_string = "\n\nPrevious conversation context:\n"
+        for i, chat in enumerate(chat_context[-5:], 1):  # Last 5 chats
+            if (
+                isinstance(chat, dict)
+                and "user_message" in chat
+                and "assistant_message" in chat
+            ):
+                context_string += f"{i}. User: {chat['user_message']}\n   Assistant: {chat['assistant_message']}\n"
+            elif isinstance(chat, dict) and "user" in chat and "assistant" in chat:
+                context_string += (
+                    f"{i}. User: {chat['user']}\n   Assistant: {chat['assistant']}\n"
+                )
+
+    # Person schema summary for Gemini
+
+    gemini_instruction = f"""
+    You are an expert at generating Elasticsearch queries for a specific API. Your task is to analyze the user's prompt and classify it into one of two categories: "Talent Search" or "Background Verification".
+
+    Based on the classification, generate a precise JSON Elasticsearch query using ONLY the structures provided below.
+
+    **1. Intent Classification:**
+    - **Talent Search**: User is looking for candidates with specific skills, experience, or location.
+    - **Background Verification**: User is searching for a specific person by name.
+
+    **2. Strict Query Generation Rules:**
+
+    **If "Talent Search", use this EXACT structure. Do not add other clauses:**
+    ```json
+    {{
+      "query": {{
+        "bool": {{
+          "must": [
+            {{ "term": {{ "location_locality": "mumbai" }} }},
+            {{ "range": {{ "inferred_years_experience": {{ "gte": 5 }} }} }},
+            {{
+              "bool": {{
+                "should": [
+                  {{ "match": {{ "job_title": "AI developer" }} }},
+                  {{ "match": {{ "skills": "artificial intelligence" }} }}
+                ]
+              }}
+            }}
+          ]
+        }}
+      }},
+      "size": 10
+    }}
+    ```
+
+    **If "Background Verification", use this EXACT structure:**
+    ```json
+    {{
+      "query": {{
+        "bool": {{
+          "must": [
+            {{ "match": {{ "first_name": "john" }} }},
+            {{ "match": {{ "last_name":"doe" }} }},
+          ]
+        }}
+      }},
+      "size": 1
+    }}
+    ```
+    
+    **CRITICAL INSTRUCTIONS:**
+    - Return **ONLY** the raw JSON query. No text, explanations, or markdown.
+    - **DO NOT** use any fields or clauses not present in the examples above. The `minimum_should_match` clause is **NOT SUPPORTED** and must not be used.
+    - Extract entities from the user's prompt (like location, skills, name) and place them into the templates.
+    
+    **Conversation Context:**
+    {context_string}
+
+    **Current User Prompt:**
+    "{prompt}"
+    """
+
+    content = llm_gateway.complete(gemini_instruction, temperature=0, stage="pdl_query")
+    if content.strip().startswith("```json"):
+        content = content.strip()[7:]
+    if content.strip().startswith("```"):
+        content = content.strip()[3:]
+    if content.strip().endswith("```"):
+        content = content.strip()[:-3]
+    content = content.strip()
+    try:
+        elastic_query = json.loads(content)
+    except Exception:
+        elastic_query = content  # Keep as string if not valid json
+
+    print("Generated Elasticsearch Query:", elastic_query)
+    emit("query", {"query": elastic_query})
+
+    # Call People Data Labs API with the elastic query
+    emit("search", {"status": "running"})
+    peoples_data = peoples_api.fetch_peoples_data(elastic_query)
+    emit("rows", {"count": len(peoples_data) if isinstance(peoples_data, list) else 0})
+
+    print("peoples data - ", peoples_data)
+    # --- Enhanced Gemini summary for recruiter with LinkedIn/GitHub URLs ---
+    summary_prompt = f"""
+    You are an expert recruiter assistant. Given the following global talent data search results, create a comprehensive and well-structured response in markdown format.
+
+    Your response should include the following sections for each candidate:
+    
+    ## Candidate Profiles
+    For each person found, create a subsection using their actual name (e.g., ### John Doe). If no name is available, use "### Candidate [Number]". Then, list their details using bullet points with bolded labels.
+    
+    - **Name**: 
+    - **Current Role**:
+    - **Company**:
+    - **Location**:
+    - **Years of Experience**: (use 'inferred_years_experience' if available, otherwise calculate from experience)
+    - **Key Skills**: (list top 5-7 skills)
+    - **Contact**: (provide email if available, otherwise 'Not available')
+    - **Social Profiles**: 
+        - LinkedIn: [linkedin.com/in/username](https://linkedin.com/in/username)
+        - GitHub: [github.com/username](https://github.com/username)
+        - Twitter: [twitter.com/username](https://twitter.com/username)
+    - **Professional Links**:
+        - Company Website: [claravest.com](https://claravest.com)
+
+    ### Background Verification Report
+    This background verification report is based on publicly available information. For a comprehensive check, a third-party service is recommended.
+    
+    **Verification Process Overview:**
+    Our process involves cross-referencing information from professional networks like LinkedIn and code repositories like GitHub. We check for:
+    1.  **Work History Consistency**: Comparing roles and timelines on LinkedIn with resume data.
+    2.  **Technical Skills Validation**: Reviewing public activity on GitHub for evidence of claimed skills.
+    3.  **Online Presence Check**: A general search for any public information that might be relevant.
+
+    **Candidate-Specific Findings:**
+    - **LinkedIn Profile**: [Provide a brief analysis of the candidate's LinkedIn. Mention if it appears professional and consistent. e.g., "John Doe's LinkedIn profile is comprehensive and aligns with typical roles in their field."]
+    - **GitHub Activity**: [Analyze their GitHub profile. e.g., "The GitHub profile shows activity in repositories related to Python and Machine Learning, supporting their listed skills." or "No public GitHub profile was found."]
+    - **Overall Assessment**: [Give a summary. e.g., "Based on public profiles, the candidate presents a consistent and professional online presence. Further verification is recommended."]
+
+    **IMPORTANT FORMATTING RULES:**
+    - Always use proper markdown syntax
+    - Use ### for candidate names and the 'Background Verification Report' section.
+    - Use ** for bold labels
+    - Use - for bullet points
+    - Ensure all links are properly formatted as markdown links
+    - If the data is empty, simply state: "No candidates found matching your criteria."
+
+    Data:
+    {json.dumps(peoples_data)}
+    """
+    summary_content = llm_gateway.complete(
+        summary_prompt,
+        temperature=0.2,
+        stage="global_summary",
+        on_token=(lambda text: emit("token", {"text": text})) if streaming else None,
+    )
+
+    return {"summary": summary_content, "raw": peoples_data}
@@ -0,0 +1,98 @@
+import os
+import time
+from psycopg2.extras import execute_values
+
+
+class BulkWriter:
+    """
+    Buffers candidate rows for several tables and writes them with one
+    multi-row INSERT per table, all in a single transaction per batch.
+
+    A batch is flushed once batch_size records are buffered or the oldest
+    buffered record is older than flush_interval seconds (checked whenever a
+    record is added), and on close(). If a batch fails it is rolled back and
+    replayed one record per transaction, so one bad candidate only loses its
+    own rows. on_written(key) / on_failed(key, error) are called per record.
+    """
+
+    def __init__(
+        self,
+        connection,
+        batch_size=None,
+        flush_interval=None,
+        on_written=None,
+        on_failed=None,
+    ):
+        self.connection = connection
+        self.batch_size = batch_size or int(os.getenv("INGEST_WRITE_BATCH_SIZE", 100))
+        self.flush_interval = flush_interval or float(
+            os.getenv("INGEST_WRITE_FLUSH_SECONDS", 5)
+        )
+        self.on_written = on_written
+        self.on_failed = on_failed
+        self._tables = {}
+        self._buffer = []
+        self._oldest = None
+
+    def add_table(self, name, table, columns, suffix=""):
+        """Registers a target; table must already be quoted/qualified"""
+        quoted_columns = ", ".join([f'"{col}"' for col in columns])
+        self._tables[name] = (
+            f"INSERT INTO {table} ({quoted_columns}) VALUES %s {suffix}".rstrip()
+        )
+
+    def add(self, key, rows):
+        """Buffers one record: rows maps table name -> list of value tuples"""
+        if not self._buffer:
+            self._oldest = time.time()
+        self._buffer.append((key, rows))
+
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.time() - self._oldest >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, []
+
+        try:
+            self._write(buffer)
+        except Exception as batch_error:
+            self.connection.rollback()
+            print(
+                f"Bulk write of {len(buffer)} records failed, retrying one by one: {batch_error}"
+            )
+            for record in buffer:
+                try:
+                    self._write([record])
+                except Exception as e:
+                    self.connection.rollback()
+                    if self.on_failed:
+                        self.on_failed(record[0], e)
+                else:
+                    if self.on_written:
+                        self.on_written(record[0])
+            return
+
+        if self.on_written:
+            for key, _ in buffer:
+                self.on_written(key)
+
+    def close(self):
+        self.flush()
+
+    def _write(self, records):
+        cursor = self.connection.cursor()
+        try:
+            for name, insert_sql in self._tables.items():
+                values = []
+                for _, rows in records:
+                    values.extend(rows.get(name, []))
+                if values:
+                    execute_values(cursor, insert_sql, values, page_size=len(values))
+            self.connection.commit()
+        finally:
+            cursor.close()
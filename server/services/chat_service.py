@@ -1,7 +1,5 @@
 from crewai import Agent, Task, Crew, Process
 from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits.sql.base import create_sql_agent
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 import os
@@ -9,13 +7,10 @@ import psycopg2
 import pandas as pd
 import requests
 import ast
-from PyPDF2 import PdfReader
 import tempfile
 import json
 from urllib.parse import urlparse, parse_qs
 import re
-import gdown
-import litellm
 import io
 import sys
 import uuid
@@ -23,14 +18,39 @@ from datetime import datetime
 from composio_openai import ComposioToolSet
 from composio import App, Action
 import traceback
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from services.bulk_writer import BulkWriter
+from services.chat_stream import ChatStreamCallbackHandler
+from services.checkpoint_store import CheckpointStore
+from services.conversation_memory import ConversationMemory
+from services.downloader import ResumeDownloader
+from services.followup_store import FollowupStore
+from services.ingestion_pipeline import IngestionPipeline
+from services.intent_classifier import IntentClassifier
+from services.llm_gateway import llm_gateway
+from services.llm_replay import chat_model_backend
+from services.llm_scheduler import BACKGROUND, INTERACTIVE
+from services.metrics import MetricsCallbackHandler, TimedCursor, metrics
+from services.near_duplicates import NearDuplicateIndex
+from services.pdf_extractor import PdfExtractor
+from services.relevance_scorer import RelevanceScorer
+from services.resume_cache import ResumeCache
+from services.scheduled_chat_model import ScheduledChatModel
+from services.sql_agent_registry import SQLAgentRegistry
+from services.sql_plan_cache import (
+    SQLCaptureCallbackHandler,
+    SQLPlanCache,
+    schema_fingerprint,
+)
+from services.table_metadata import table_metadata
 
 load_dotenv()
 
-TEMP_DIR = os.path.join(os.path.dirname(__file__), "..", "temp")
-
-if not os.path.exists(TEMP_DIR):
-    os.makedirs(TEMP_DIR)
-
 toolset = ComposioToolSet()
 
 
@@ -43,14 +63,7 @@ class LiteLLMAgent(Agent):
     def execute_task(self, task, context=None, tools=None):
         try:
             print(f"Executing task: {task.description}")
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": task.description}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
-            print(f"LiteLLM Response: {response}")
-
-            output_content = response.choices[0].message.content
+            output_content = llm_gateway.complete(task.description)
             print(f"Output content: {output_content}")
             return output_content
         except Exception as e:
@@ -59,14 +72,67 @@ class LiteLLMAgent(Agent):
 
 
 class ChatService:
+    LOCAL_SCORE_COLUMN = "local_score"
+    INTENTS = ("sql", "bestfit", "gmail", "calendar", "unknown")
+    # answer layout shared by the SQL agent and cached SQL plan answers
+    SQL_ANSWER_FORMAT = """
+                    Please format the final answer like this:
+                    ---
+                    **🔍 Result**
+                    The natural language response obtained from the data, here also include the reason/logic behind the answer being given, like mentioning the source or why a particular candidate is more apt etc, this would help the HR make decisions in a more informed manner since the proofs and logic etc can be verified from the data source as well.
+
+                    **📊 Data Overview**
+                    Table or bullet points showing the SQL result
+
+                    **Conclusion**
+                    A final conclusion of the query
+                    ---
+
+                    IMPORTANT GUIDELINES  :
+                        a. Only include sections that make sense for the result. Be brief but informative.
+                        b. The user using this application is an HR so make sure not to use technical terms in the response, keep it easy flowing and understandable.
+    """
+    INTENT_DEFINITIONS = """
+            - "sql": if the question relates to querying a candidate database.
+            - "bestfit": if the question relates to the showing proofs/reasons/source of why the candidate is a perfect fit (samples might include question like - why do you think the candidate mansi is a good fit?)
+            - "gmail": if it involves sending, replying to, or checking emails.
+            - "calendar": if it involves scheduling or managing meetings on a calendar.
+            - "unknown": if the intent is unclear or unsupported."""
+
     def __init__(self):
-        self.data_processor = ChatGoogleGenerativeAI(
+        # the SQL agent's chat model is admitted through the gateway's
+        # scheduler like every other LLM call
+        self.data_processor = ScheduledChatModel(
+            inner=chat_model_backend(
+                lambda: ChatGoogleGenerativeAI(
+                    model="gemini-2.0-flash",
+                    google_api_key=os.getenv("GOOGLE_API_KEY"),
+                    temperature=0,
+                )
+            ),
+            scheduler=llm_gateway.scheduler,
             model="gemini-2.0-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0,
+            streaming=True,
         )
 
         self.connection_string = os.getenv("CONNECTION_URL")
+        self.resume_cache = ResumeCache()
+        self.pdf_extractor = PdfExtractor()
+        self.downloader = ResumeDownloader()
+        self.checkpoints = CheckpointStore()
+        self.intent_classifier = IntentClassifier()
+        self.followups = FollowupStore()
+        self.memory = ConversationMemory(self._get_db_connection)
+        self.table_metadata = table_metadata
+        self.sql_agents = SQLAgentRegistry(
+            self.connection_string, self.data_processor, self.table_metadata
+        )
+        self.sql_plans = SQLPlanCache(self._get_db_connection)
+        self.jd_summary_cache_size = int(os.getenv("JD_SUMMARY_CACHE_SIZE", 256))
+        self.jd_summary_ttl = float(os.getenv("JD_SUMMARY_TTL", 30))
+        self._jd_summaries = OrderedDict()
+        self._jd_summaries_lock = threading.Lock()
+        self._jd_schema_ready = False
         self._init_db()
 
     def _init_db(self):
@@ -97,33 +163,17 @@ class ChatService:
                 "password": parsed.password,
                 "database": parsed.path.lstrip("/"),
             }
-            return psycopg2.connect(**db_config)
+            return psycopg2.connect(**db_config, cursor_factory=TimedCursor)
         except Exception as e:
             raise Exception(f"Error creating database connection: {str(e)}")
 
     def rephrase_with_chat_context(self, query, user_id, table_name, connection):
-        cursor = connection.cursor()
+        # rolling thread summary plus the last raw turns
+        chat_context = self.memory.build_context(connection, user_id, table_name)
 
-        # Fetch last 10 messages for context
-        cursor.execute(
-            """
-            SELECT question, response FROM private.threads
-            WHERE user_id = %s AND table_id = %s
-            ORDER BY timestamp DESC
-            LIMIT 10
-        """,
-            (user_id, table_name),
-        )
-
-        history = cursor.fetchall()
-        cursor.close()
-
-        if not history:
+        if not chat_context:
             return query  # No context, return as-is
 
-        # Build chat history string
-        chat_context = "\n".join([f"User: {q}\nBot: {r}" for q, r in reversed(history)])
-
         prompt = f"""
         You are an AI assistant helping with SQL-related questions based on previous conversation history.
 
@@ -143,13 +193,9 @@ class ChatService:
         """
 
         # Call LLM to rephrase
-        response = litellm.completion(
-            model="gemini/gemini-2.0-flash",
-            messages=[{"role": "user", "content": prompt}],
-            api_key=os.getenv("GOOGLE_API_KEY"),
-        )
+        response = llm_gateway.complete(prompt, temperature=0)
 
-        rephrased_question = response.choices[0].message.content.strip()
+        rephrased_question = response.strip()
 
         print("till here 2 - ", rephrased_question)
 
@@ -158,54 +204,88 @@ class ChatService:
         return rephrased_question
 
     def detect_intent(self, question: str) -> str:
+        # local rules + char n-gram model answer most messages without the LLM
+        local_intent = self.intent_classifier.predict(question)
+        if local_intent:
+            print(f"Intent resolved locally: {local_intent}")
+            return local_intent
+
         intent_prompt = f"""
             You are an intent classifier for an HR assistant.
 
             Classify the intent of the following user question into one of:
-            - "sql": if the question relates to querying a candidate database.
-            - "bestfit": if the question relates to the showing proofs/reasons/source of why the candidate is a perfect fit (samples might include question like - why do you think the candidate mansi is a good fit?)
-            - "gmail": if it involves sending, replying to, or checking emails.
-            - "calendar": if it involves scheduling or managing meetings on a calendar.
-            - "unknown": if the intent is unclear or unsupported.
+            {self.INTENT_DEFINITIONS}
 
             User Question: "{question}"
 
             Respond with only one word: "sql","bestfit", "gmail", "calendar", or "unknown".
             """
-        response = litellm.completion(
-            model="gemini/gemini-2.0-flash",
-            messages=[{"role": "user", "content": intent_prompt}],
-            api_key=os.getenv("GOOGLE_API_KEY"),
-        )
+        response = llm_gateway.complete(intent_prompt, temperature=0)
 
-        return response.choices[0].message.content.strip().lower()
+        return response.strip().lower()
 
-    def process_query(self, table_name, query, user_id):
-        try:
-            # Create SQL agent with proper configuration
-            db = SQLDatabase.from_uri(
-                self.connection_string, include_tables=[table_name]
-            )
+    def rephrase_and_detect_intent(self, query, user_id, table_name, connection):
+        """
+        Returns (rephrased_query, intent) from a single structured LLM call.
+        Without chat history there is nothing to rephrase, so the query is
+        used as-is and only the intent is classified.
+        """
+        chat_context = self.memory.build_context(connection, user_id, table_name)
+        if not chat_context:
+            return query, self.detect_intent(query)
 
-            # Create SQL toolkit and agent
-            toolkit = SQLDatabaseToolkit(db=db, llm=self.data_processor)
-            agent = create_sql_agent(
-                llm=self.data_processor,
-                toolkit=toolkit,
-                verbose=True,
-                agent_type="openai-tools",
-                handle_parsing_errors=True,
-            )
+        prompt = f"""
+        You are an AI assistant for an HR tool that answers questions about candidate data.
+
+        Conversation so far:
+        {chat_context}
+
+        New user question: "{query}"
+
+        Do two things:
+        1. Determine whether the new question is a follow-up. If yes, rephrase it into a fully self-contained question that includes the necessary context from earlier (it must work as a self contained text to sql query). If it is not related, keep the original question as-is.
+        2. Classify the intent of the resulting question into one of:
+            {self.INTENT_DEFINITIONS}
+
+        Return ONLY a JSON object in this format:
+        {{"question": "<rephrased or original question>", "intent": "<sql|bestfit|gmail|calendar|unknown>"}}
+        """
 
+        response = llm_gateway.complete(
+            prompt, temperature=0, response_format={"type": "json_object"}
+        )
+
+        try:
+            content = response.strip().replace("```json", "").replace("```", "").strip()
+            parsed = json.loads(content)
+            rephrased_query = str(parsed.get("question") or query).strip()
+            intent = str(parsed.get("intent", "")).strip().lower()
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"Could not parse rephrase/intent response, classifying only: {e}")
+            return query, self.detect_intent(query)
+
+        if intent not in self.INTENTS:
+            intent = self.detect_intent(rephrased_query)
+        return rephrased_query, intent
+
+    def process_query(self, table_name, query, user_id, emit=None):
+        """
+        Answers a chat message. emit(event, data), when given, receives the
+        stage events of a streaming response (rephrased, intent, sql, rows and
+        the answer tokens).
+        """
+        emit = emit or (lambda event, data=None: None)
+        try:
             # First, get the table schema to provide context
             connection = self._get_db_connection()
             cursor = connection.cursor()
 
-            # create a rephraser layer which will access the past 10 chat history in the thread and then create a contextually aware chat interface
-            # Add this before enhanced_query is constructed
-            rephrased_query = self.rephrase_with_chat_context(
+            # rephraser + intent layer: one call turns the message into a self
+            # contained question using the thread history and classifies it
+            rephrased_query, intent = self.rephrase_and_detect_intent(
                 query, user_id, table_name, connection
             )
+            emit("rephrased", {"query": rephrased_query})
 
             print(
                 "------------------------STAGE 0 QUERY REPHRASER------------------------"
@@ -216,8 +296,8 @@ class ChatService:
             )
             print()
 
-            # now checking the intent of the query to route it appropritely to the user
-            intent = self.detect_intent(rephrased_query)
+            # the intent decides where the query is routed
+            emit("intent", {"intent": intent})
             print(
                 "------------------------STAGE 1 INTENT DETECTOR------------------------"
             )
@@ -233,29 +313,47 @@ class ChatService:
             elif intent == "calendar":
                 return self.create_calendar_event(rephrased_query)
             elif intent == "sql":
+                message_id = str(uuid.uuid4())
                 try:
-                    cursor.execute(
-                        f"""
-                        SELECT column_name, data_type 
-                        FROM information_schema.columns 
-                        WHERE table_name = '{table_name}' 
-                        AND table_schema = 'public'
-                        ORDER BY ordinal_position
-                    """
-                    )
-                    schema = cursor.fetchall()
-
-                    if not schema:
+                    # schema from the shared per-table metadata cache, no
+                    # information_schema round trip per message
+                    schema_info = self.table_metadata.schema_info(table_name)
+                    if not schema_info:
                         return f"Table '{table_name}' not found or has no accessible columns."
 
-                    # Get sample data to understand the table better
-                    cursor.execute(f'SELECT * FROM "{table_name}" LIMIT 3')
-                    sample_data = cursor.fetchall()
-
-                    # Build enhanced prompt with context
-                    schema_info = "\n".join(
-                        [f"- {col[0]} ({col[1]})" for col in schema]
+                    # a question answered before on the same schema replays the
+                    # SQL the agent ran, only the answer formatting goes to the LLM
+                    fingerprint = schema_fingerprint(
+                        self.table_metadata.get(table_name)
+                    )
+                    plan_sql = self.sql_plans.lookup(
+                        table_name, rephrased_query, fingerprint
                     )
+                    plan_result = None
+                    if plan_sql:
+                        # only a plan that no longer runs is dropped, errors
+                        # formatting its rows leave it cached
+                        try:
+                            plan_result = self._run_sql_plan(plan_sql, emit)
+                        except Exception as e:
+                            print(f"Cached SQL plan failed, using the agent: {str(e)}")
+                            self.sql_plans.invalidate(
+                                table_name, rephrased_query, fingerprint
+                            )
+                    if plan_result:
+                        final_resp = self._answer_from_sql_plan(
+                            rephrased_query, plan_sql, plan_result, emit
+                        )
+                        self.followups.submit(
+                            message_id,
+                            lambda: self._generate_followups(
+                                rephrased_query, final_resp
+                            ),
+                        )
+                        return {"response": final_resp, "message_id": message_id}
+
+                    # agent reused across messages until the table is rebuilt
+                    agent = self.sql_agents.get(table_name)
 
                     enhanced_query = f"""
                     You are a helpful AI assistant designed to support HR professionals by answering questions about candidate data from the database.
@@ -273,25 +371,29 @@ class ChatService:
                         - Add brief **interpretation/explanation** of the data in simple terms.
                     3. If the question involves candidate availability, communication status, or next steps, **answer conversationally** like an assistant helping an HR person.                    
 
-                    Please format the final answer like this:
-                    ---
-                    **🔍 Result**
-                    The natural language response obtained from the data, here also include the reason/logic behind the answer being given, like mentioning the source or why a particular candidate is more apt etc, this would help the HR make decisions in a more informed manner since the proofs and logic etc can be verified from the data source as well.
-
-                    **📊 Data Overview**
-                    Table or bullet points showing the SQL result
-
-                    **Conclusion**
-                    A final conclusion of the query
-                    ---
-
-                    IMPORTANT GUIDELINES  :
-                        a. Only include sections that make sense for the result. Be brief but informative.
-                        b. The user using this application is an HR so make sure not to use technical terms in the response, keep it easy flowing and understandable.
+                    {self.SQL_ANSWER_FORMAT}
                     """
 
                     # Use invoke instead of run
-                    result = agent.invoke({"input": enhanced_query})
+                    emit("sql", {"status": "running"})
+                    sql_capture = SQLCaptureCallbackHandler()
+                    with metrics.timed("llm", "sql_agent"):
+                        result = agent.invoke(
+                            {"input": enhanced_query},
+                            config={
+                                "callbacks": [
+                                    ChatStreamCallbackHandler(emit),
+                                    MetricsCallbackHandler(
+                                        "sql_agent", self.data_processor.model
+                                    ),
+                                    sql_capture,
+                                ]
+                            },
+                        )
+                    if sql_capture.sql:
+                        self.sql_plans.store(
+                            table_name, rephrased_query, fingerprint, sql_capture.sql
+                        )
 
                     # print("here was the llm response - ", result["output"])
 
@@ -301,44 +403,13 @@ class ChatService:
                     else:
                         final_resp = str(result)
 
-                    followup_prompt = f"""
-                        You are an AI assistant helping HR professionals analyze candidate data.
-
-                        Given the following user question and the AI-generated answer (based on SQL results), generate a list of 3 most relevant and logical follow-up questions.
-
-                        Guidelines:
-                        - The follow-up questions must be **resolvable using SQL queries** on the same table.
-                        - They should be **related** to the user's original question and **extend the conversation meaningfully**.
-                        - Avoid vague or generic questions.
-                        - The questions should help the HR make informed decisions or take actions.
-                        - Do NOT repeat the original question or restate its answer.
-
-                        Return ONLY a JSON list of 3 strings in the following format - 
-                        
-
-                        Original Question:
-                        {rephrased_query}
-
-                        LLM Answer:
-                        {final_resp}
-
-                        Your output:
-                    """
-
-                    followup_response = litellm.completion(
-                        model="gemini/gemini-2.0-flash",
-                        messages=[{"role": "user", "content": followup_prompt}],
-                        api_key=os.getenv("GOOGLE_API_KEY"),
+                    # follow-ups are generated in the background and fetched by
+                    # message id, so they never hold up the answer
+                    self.followups.submit(
+                        message_id,
+                        lambda: self._generate_followups(rephrased_query, final_resp),
                     )
-
-                    followups = followup_response.choices[0].message.content.strip()
-                    followups = (
-                        followups.replace("```json", "").replace("```", "").strip()
-                    )
-                    return {
-                        "response": final_resp,
-                        "followups": ast.literal_eval(followups),
-                    }
+                    return {"response": final_resp, "message_id": message_id}
 
                 finally:
                     # first checking if a thread id already exists
@@ -366,7 +437,7 @@ class ChatService:
                         final_resp,
                         thread_id,
                         current_timestamp,
-                        str(uuid.uuid4()),
+                        message_id,
                     ]
 
                     print(values)
@@ -374,6 +445,9 @@ class ChatService:
                     print(f"Debug: Inserting conversation data...")
                     cursor.execute(insert_sql, values)
                     connection.commit()
+                    self.memory.record_turn(
+                        user_id, table_name, rephrased_query, final_resp
+                    )
                     cursor.close()
                     connection.close()
             else:
@@ -386,6 +460,75 @@ class ChatService:
             except Exception as fallback_error:
                 return f"Error processing query: {str(e)}\nFallback error: {str(fallback_error)}"
 
+    def _run_sql_plan(self, sql, emit):
+        """Runs a cached SQL plan, returns (column_names, rows, total_rows)"""
+        emit("sql", {"status": "running", "query": sql})
+        with metrics.stage("sql_plan_query"):
+            plan_result = self.sql_plans.run(sql)
+        emit("rows", {"count": plan_result[2]})
+        return plan_result
+
+    def _answer_from_sql_plan(self, question, sql, plan_result, emit):
+        """Has the LLM format the rows of a cached SQL plan only"""
+        column_names, rows, total_rows = plan_result
+        results = [
+            {column: str(value) for column, value in zip(column_names, row)}
+            for row in rows
+        ]
+        prompt = f"""
+                    You are a helpful AI assistant designed to support HR professionals by answering questions about candidate data from the database.
+
+                    User question: "{question}"
+
+                    This SQL query was run to answer it:
+                    {sql}
+
+                    It returned {total_rows} rows, the first {len(results)} are:
+                    {json.dumps(results, indent=2)}
+
+                    Answer the question from these results only, in a professional, clear, and human-readable format.
+                    {self.SQL_ANSWER_FORMAT}
+                    """
+        return llm_gateway.complete(
+            prompt,
+            stage="sql_plan_answer",
+            on_token=lambda text: emit("token", {"text": text}),
+        )
+
+    def _generate_followups(self, question, answer):
+        """Suggests 3 follow-up questions for an answered SQL question"""
+        followup_prompt = f"""
+            You are an AI assistant helping HR professionals analyze candidate data.
+
+            Given the following user question and the AI-generated answer (based on SQL results), generate a list of 3 most relevant and logical follow-up questions.
+
+            Guidelines:
+            - The follow-up questions must be **resolvable using SQL queries** on the same table.
+            - They should be **related** to the user's original question and **extend the conversation meaningfully**.
+            - Avoid vague or generic questions.
+            - The questions should help the HR make informed decisions or take actions.
+            - Do NOT repeat the original question or restate its answer.
+
+            Return ONLY a JSON list of 3 strings in the following format - 
+
+
+            Original Question:
+            {question}
+
+            LLM Answer:
+            {answer}
+
+            Your output:
+        """
+
+        followups = llm_gateway.complete(followup_prompt).strip()
+        followups = followups.replace("```json", "").replace("```", "").strip()
+        return ast.literal_eval(followups)
+
+    def get_followups(self, message_id, timeout=0):
+        """Follow-ups of a chat message, waiting up to timeout seconds for them"""
+        return self.followups.get(message_id, timeout=timeout)
+
     def _execute_direct_query(self, table_name, query):
         """Fallback method to execute queries directly"""
         try:
@@ -393,22 +536,10 @@ class ChatService:
             cursor = connection.cursor()
 
             # Get table schema
-            cursor.execute(
-                f"""
-                SELECT column_name, data_type 
-                FROM information_schema.columns 
-                WHERE table_name = '{table_name}' 
-                AND table_schema = 'public'
-                ORDER BY ordinal_position
-            """
-            )
-            schema = cursor.fetchall()
-
-            if not schema:
+            schema_info = self.table_metadata.schema_info(table_name)
+            if not schema_info:
                 return f"Table '{table_name}' not found."
 
-            schema_info = "\n".join([f"- {col[0]} ({col[1]})" for col in schema])
-
             # Use LLM to generate SQL query
             prompt = f"""
             You are a SQL expert. Generate a SQL query for the following request.
@@ -422,13 +553,9 @@ class ChatService:
             Return ONLY the SQL query, no explanations or formatting.
             """
 
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
+            response = llm_gateway.complete(prompt, temperature=0, stage="direct_sql")
 
-            sql_query = response.choices[0].message.content.strip()
+            sql_query = response.strip()
 
             # Clean up the SQL query
             sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
@@ -462,14 +589,10 @@ class ChatService:
             Provide a clear, concise explanation of what the results show.
             """
 
-            explanation_response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": explanation_prompt}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
+            explanation = llm_gateway.complete(
+                explanation_prompt, stage="direct_sql_explanation"
             )
 
-            explanation = explanation_response.choices[0].message.content
-
             cursor.close()
             connection.close()
 
@@ -482,247 +605,818 @@ class ChatService:
                 connection.close()
             raise Exception(f"Error in direct query execution: {str(e)}")
 
-    def process_new_chat(self, df, jd_text, table_name):
-        try:
-            print("Step 1: Analyzing job description to determine required columns...")
-            columns_response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f'Analyze this job description and determine what columns should be in a candidates database table. Return ONLY a JSON array of column names that would be useful for storing candidate information relevant to this job. Include standard fields like name, email, phone, skills, experience, education, etc. Example format: ["name", "email", "phone", "skills", "experience", "education", "linkedin"].\n\nJob Description:\n{jd_text}',
-                    }
-                ],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
-
-            columns_content = columns_response.choices[0].message.content.strip()
-            print(f"Debug: Raw columns response: {columns_content}")
-
-            if columns_content.startswith("```json"):
-                columns_content = columns_content[len("```json") :].lstrip()
-            if columns_content.endswith("```"):
-                columns_content = columns_content[: -len("```")].rstrip()
-
-            try:
-                columns = json.loads(columns_content)
-                if not isinstance(columns, list) or not columns:
-                    raise ValueError("Expected non-empty list")
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"Failed to parse columns JSON, using default: {e}")
-
-                columns = [
-                    "name",
-                    "email",
-                    "phone",
-                    "skills",
-                    "experience",
-                    "education",
-                    "linkedin",
-                ]
-
-            print(f"Debug: Extracted columns: {columns}")
-
-            if "score" not in [col.lower() for col in columns]:
-                columns.append("score")
+    def process_new_chat(
+        self, candidates, jd_text, table_name, job=None, resume=False, csv_path=None
+    ):
+        """
+        candidates is either a DataFrame or an iterable of DataFrame chunks
+        (see services.csv_intake.iter_candidate_chunks); chunks are pulled
+        lazily so a large CSV is never fully resident.
 
-            print(f"Step 2: Creating table {table_name} with columns: {columns}")
+        With resume=True and an existing job table, the table, its columns and
+        the stored JD are reused and candidates that already have a checkpoint
+        are skipped instead of dropping and rebuilding everything.
+        """
+        try:
             connection = self._get_db_connection()
+            cursor = self._lock_ingestion(connection, table_name)
 
             try:
-                cursor = connection.cursor()
+                self.checkpoints.ensure_tables(cursor)
+                connection.commit()
 
-                # Ensure private.jobDesc table exists
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS private.jobDesc (
-                        id SERIAL PRIMARY KEY,
-                        table_name TEXT NOT NULL,
-                        jd_content TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """
+                columns = (
+                    self._get_job_table_columns(cursor, table_name) if resume else None
                 )
+                resumed = bool(columns)
 
-                cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
-
-                create_table_columns = ", ".join([f'"{col}" TEXT' for col in columns])
-                create_table_sql = f"""
-                    CREATE TABLE "{table_name}" (
-                        id SERIAL PRIMARY KEY,
-                        {create_table_columns},
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                if resumed:
+                    print(
+                        f"Resuming ingestion into {table_name} with columns: {columns}"
                     )
-                """
-                print(f"Debug: CREATE TABLE SQL: {create_table_sql}")
-                cursor.execute(create_table_sql)
-                current_timestamp = datetime.now()
-                cursor.execute(
-                    "INSERT INTO private.jobDesc (id,table_name, jd_content,created_at) VALUES (%s,%s,%s, %s)",
-                    (1, table_name, jd_text, current_timestamp),
+                else:
+                    # the JD summary is produced alongside the column set and
+                    # stored with the JD, so it is never generated on read
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        summary = executor.submit(
+                            self._summarize_job_description_safely, jd_text
+                        )
+                        columns = self._determine_columns(jd_text)
+                        jd_summary = summary.result()
+                    print(
+                        f"Step 2: Creating table {table_name} with columns: {columns}"
+                    )
+                    self._create_job_table(
+                        cursor, table_name, columns, jd_text, jd_summary
+                    )
+                    print(f"Table {table_name} created successfully")
+
+                self.checkpoints.start_run(
+                    cursor, table_name, csv_path, reset=not resumed
                 )
                 connection.commit()
-                print(f"Table {table_name} created successfully")
-
-                print("Step 3: Processing candidates...")
-                processed_count = 0
-
-                for index, row in df.iterrows():
-                    try:
-                        print(f"Processing candidate {index + 1}/{len(df)}")
+                if not resumed:
+                    # a rebuilt table gets a new metadata version and agent
+                    self.table_metadata.refresh(table_name)
+                    self.sql_agents.invalidate(table_name)
+
+                counts = self._ingest_candidates(
+                    connection,
+                    cursor,
+                    candidates,
+                    jd_text,
+                    table_name,
+                    columns,
+                    job=job,
+                    skip_done=resumed,
+                )
 
-                        resume_text = self._download_and_extract_resume(row["pdf_url"])
-                        print(
-                            f"Resume text extracted, length: {len(resume_text)} characters"
-                        )
+                self.checkpoints.finish_run(cursor, table_name, "completed")
+                connection.commit()
 
-                        # saving the resume text for all the candidate
-                        insert_columns = "id, name, resume_link, resume_text"
-                        placeholders = ", ".join(["%s"] * 4)
-                        insert_sql = f"INSERT INTO private.candidates ({insert_columns}) VALUES ({placeholders})"
+            except Exception as e:
+                connection.rollback()
+                try:
+                    self.checkpoints.finish_run(cursor, table_name, "failed")
+                    connection.commit()
+                except Exception as checkpoint_error:
+                    print(f"Could not mark ingestion as failed: {checkpoint_error}")
+                raise Exception(f"Database operation failed: {e}")
+            finally:
+                cursor.close()
+                connection.close()
+                self.table_metadata.refresh(table_name)
 
-                        values = [
-                            str(uuid.uuid4()),
-                            row["name"],
-                            row["pdf_url"],
-                            resume_text,
-                        ]
+            return {
+                "message": f"Processing completed successfully. {counts['processed']} candidates processed.",
+                "duplicates": counts["duplicates"],
+            }
 
-                        print(values)
+        except Exception as e:
+            raise Exception(f"Error processing new chat: {str(e)}")
 
-                        print(f"Debug: Inserting candidates data...")
-                        cursor.execute(insert_sql, values)
-                        connection.commit()
-                        cursor.close()
-                        connection.close()
+    def append_candidates(self, candidates, table_name, job=None, csv_path=None):
+        """
+        Adds candidates to an existing job table, reusing its stored JD and
+        column set. Candidates already ingested into the table are skipped, so
+        the cost is proportional to the new rows only.
+        """
+        try:
+            jd_text = self.get_job_description_text(table_name)
+            if not jd_text:
+                raise Exception(f"No job description stored for {table_name}")
 
-                        print("Extracting candidate information...")
-                        candidate_info = self._extract_candidate_info_for_jd(
-                            resume_text, jd_text, columns
-                        )
-                        print(
-                            f"Candidate info extracted: {list(candidate_info.keys())}"
-                        )
+            connection = self._get_db_connection()
+            cursor = self._lock_ingestion(connection, table_name)
 
-                        print("Calculating match score...")
-                        score = self._calculate_score(candidate_info, jd_text)
-                        candidate_info["score"] = str(score)
-                        print(f"Match score: {score}")
-
-                        insert_columns = ", ".join([f'"{col}"' for col in columns])
-                        placeholders = ", ".join(["%s"] * len(columns))
-                        insert_sql = f'INSERT INTO "{table_name}" ({insert_columns}) VALUES ({placeholders})'
-
-                        values = []
-                        for col in columns:
-                            value = candidate_info.get(col, "")
-                            if value is None:
-                                values.append("")
-                            else:
-                                values.append(str(value))
-
-                        print(f"Debug: Inserting candidate data...")
-                        cursor.execute(insert_sql, values)
-                        connection.commit()
-                        processed_count += 1
-                        print(f"Candidate {index + 1} processed successfully")
+            try:
+                self.checkpoints.ensure_tables(cursor)
+                columns = self._get_job_table_columns(cursor, table_name)
+                if not columns:
+                    raise Exception(f"Table {table_name} does not exist")
 
-                    except Exception as candidate_error:
-                        print(
-                            f"Error processing candidate {index + 1}: {candidate_error}"
-                        )
-                        continue
+                self.checkpoints.start_run(cursor, table_name, csv_path)
+                connection.commit()
 
-                print(
-                    f"Processing completed. {processed_count} candidates processed successfully."
+                counts = self._ingest_candidates(
+                    connection,
+                    cursor,
+                    candidates,
+                    jd_text,
+                    table_name,
+                    columns,
+                    job=job,
+                    skip_done=True,
                 )
 
+                self.checkpoints.finish_run(cursor, table_name, "completed")
+                connection.commit()
+
             except Exception as e:
                 connection.rollback()
+                try:
+                    self.checkpoints.finish_run(cursor, table_name, "failed")
+                    connection.commit()
+                except Exception as checkpoint_error:
+                    print(f"Could not mark ingestion as failed: {checkpoint_error}")
                 raise Exception(f"Database operation failed: {e}")
             finally:
                 cursor.close()
                 connection.close()
+                self.table_metadata.refresh(table_name)
 
             return {
-                "message": f"Processing completed successfully. {processed_count} candidates processed."
+                "message": f"Appended {counts['processed']} new candidates to {table_name}.",
+                "duplicates": counts["duplicates"],
             }
 
         except Exception as e:
-            raise Exception(f"Error processing new chat: {str(e)}")
+            raise Exception(f"Error appending candidates: {str(e)}")
+
+    def _ingest_candidates(
+        self,
+        connection,
+        cursor,
+        candidates,
+        jd_text,
+        table_name,
+        columns,
+        job=None,
+        skip_done=False,
+    ):
+        """
+        Runs every candidate through the ingestion pipeline and bulk-writes the
+        results into the job table. With skip_done, candidates that already
+        have a checkpoint for this table are skipped. Near-duplicate resumes
+        within the run are not scored; they are linked to the first candidate
+        with that resume in the duplicates table instead. Returns the counts of
+        candidates stored and of duplicates linked.
+        """
+        print("Step 3: Processing candidates...")
+        counts = {"processed": 0, "duplicates": 0, "total": 0}
+        duplicate_keys = set()
+        # a resume is reserved in the near-duplicate index as soon as it is
+        # first seen. Near-duplicates of a resume whose candidate is not
+        # stored yet are held back: they are linked once it is written, or go
+        # through duplicate detection and scoring again if it fails.
+        reserved = {}
+        held = {}
+        to_link = []
+        to_retry = []
+
+        def release(candidate_key):
+            duplicates.release(candidate_key)
+            to_retry.extend(held.pop(candidate_key, ()))
+
+        def on_written(key):
+            index, name = key
+            candidate_key = reserved.pop(key, None)
+            if candidate_key:
+                duplicates.confirm(candidate_key)
+                to_link.extend(held.pop(candidate_key, ()))
+            if key in duplicate_keys:
+                duplicate_keys.discard(key)
+                counts["duplicates"] += 1
+                if job:
+                    job.candidate_duplicated(index, name)
+                print(f"Candidate {index + 1}/{counts['total']} linked as a duplicate")
+                return
+
+            counts["processed"] += 1
+            if job:
+                job.candidate_succeeded(index, name)
+            print(f"Candidate {index + 1}/{counts['total']} processed successfully")
+
+        def on_failed(key, error):
+            index, name = key
+            candidate_key = reserved.pop(key, None)
+            if candidate_key:
+                release(candidate_key)
+            duplicate_keys.discard(key)
+            print(f"Error processing candidate {index + 1}: {error}")
+            if job:
+                job.candidate_failed(index, name, error)
+
+        writer = BulkWriter(connection, on_written=on_written, on_failed=on_failed)
+        writer.add_table(
+            "candidates",
+            "private.candidates",
+            ["id", "name", "resume_link", "resume_text"],
+        )
+        writer.add_table("job", f'"{table_name}"', columns)
+        writer.add_table(
+            "checkpoint",
+            self.checkpoints.CHECKPOINT_TABLE,
+            ["table_name", "candidate_key"],
+            suffix="ON CONFLICT DO NOTHING",
+        )
+        writer.add_table(
+            "duplicate",
+            self.checkpoints.DUPLICATE_TABLE,
+            [
+                "table_name",
+                "candidate_key",
+                "duplicate_of",
+                "name",
+                "resume_link",
+                "similarity",
+            ],
+            suffix="ON CONFLICT DO NOTHING",
+        )
 
-    def _is_google_drive_url(self, url):
-        return "drive.google.com" in url
+        pipeline = IngestionPipeline()
+        scorer = RelevanceScorer(jd_text, corpus=self._reference_resumes())
+        duplicates = NearDuplicateIndex()
+        rows = self._iter_candidate_rows(
+            candidates, counts, job, cursor if skip_done else None, table_name
+        )
+        batch_size = int(os.getenv("INGEST_LLM_BATCH_SIZE", 1))
+        batches = self._batched(enumerate(rows), batch_size)
+
+        def submit(index, row, processed, candidate_error=None):
+            key = (index, row["name"])
+            candidate_key = self.checkpoints.candidate_key(row)
+            if candidate_error:
+                release(candidate_key)
+                on_failed(key, candidate_error)
+                return
+
+            resume_text, candidate_info, duplicate = processed
+            if duplicate:
+                first_key, similarity = duplicate
+                if duplicates.is_pending(first_key):
+                    held.setdefault(first_key, []).append((index, row, processed))
+                    return
+                if first_key not in duplicates:
+                    # the first candidate failed after this one matched it
+                    to_retry.append((index, row, processed))
+                    return
+
+                duplicate_keys.add(key)
+                writer.add(
+                    key,
+                    {
+                        "duplicate": [
+                            (
+                                table_name,
+                                candidate_key,
+                                first_key,
+                                row["name"],
+                                row["pdf_url"],
+                                similarity,
+                            )
+                        ],
+                        "checkpoint": [(table_name, candidate_key)],
+                    },
+                )
+                return
+
+            reserved[key] = candidate_key
+            writer.add(
+                key,
+                {
+                    # saving the resume text for all the candidate
+                    "candidates": [
+                        (
+                            str(uuid.uuid4()),
+                            row["name"],
+                            row["pdf_url"],
+                            resume_text,
+                        )
+                    ],
+                    "job": [self._table_row(candidate_info, columns)],
+                    "checkpoint": [(table_name, candidate_key)],
+                },
+            )
 
-    def _get_google_drive_file_id(self, url):
-        if "id=" in url:
-            return parse_qs(urlparse(url).query)["id"][0]
-        elif "/d/" in url:
-            return url.split("/d/")[1].split("/")[0]
-        return None
+        def resolve_held():
+            # writer callbacks only queue candidates, they are submitted here
+            # so the writer is never re-entered from its own flush
+            while to_link or to_retry:
+                if to_link:
+                    submit(*to_link.pop(0))
+                    continue
+                index, row, (resume_text, _, _) = to_retry.pop(0)
+                duplicate = duplicates.find(
+                    self.checkpoints.candidate_key(row), resume_text
+                )
+                if duplicate:
+                    submit(index, row, (resume_text, None, duplicate))
+                    continue
+                for outcome in self._score_candidates(
+                    [(index, row, resume_text)], jd_text, columns, pipeline, scorer
+                ):
+                    submit(*outcome)
+
+        for _, batch, outcomes, batch_error in pipeline.run(
+            batches,
+            lambda batch: self._process_candidate_batch(
+                batch, jd_text, columns, pipeline, scorer, duplicates
+            ),
+        ):
+            if batch_error:
+                outcomes = [(index, row, None, batch_error) for index, row in batch]
+
+            for outcome in outcomes:
+                submit(*outcome)
+            resolve_held()
+
+        # every reserved candidate is written or failed once the writer is
+        # flushed, which releases whatever is still held back
+        writer.flush()
+        while to_link or to_retry:
+            resolve_held()
+            writer.flush()
+
+        writer.close()
+        return counts
+
+    def _determine_columns(self, jd_text):
+        print("Step 1: Analyzing job description to determine required columns...")
+        columns_response = llm_gateway.complete(
+            [
+                {
+                    "role": "user",
+                    "content": f'Analyze this job description and determine what columns should be in a candidates database table. Return ONLY a JSON array of column names that would be useful for storing candidate information relevant to this job. Include standard fields like name, email, phone, skills, experience, education, etc. Example format: ["name", "email", "phone", "skills", "experience", "education", "linkedin"].\n\nJob Description:\n{jd_text}',
+                }
+            ],
+            temperature=0,
+            priority=BACKGROUND,
+        )
+
+        columns_content = columns_response.strip()
+        print(f"Debug: Raw columns response: {columns_content}")
+
+        if columns_content.startswith("```json"):
+            columns_content = columns_content[len("```json") :].lstrip()
+        if columns_content.endswith("```"):
+            columns_content = columns_content[: -len("```")].rstrip()
 
-    def _download_and_extract_resume(self, pdf_url):
         try:
+            columns = json.loads(columns_content)
+            if not isinstance(columns, list) or not columns:
+                raise ValueError("Expected non-empty list")
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Failed to parse columns JSON, using default: {e}")
+
+            columns = [
+                "name",
+                "email",
+                "phone",
+                "skills",
+                "experience",
+                "education",
+                "linkedin",
+            ]
+
+        print(f"Debug: Extracted columns: {columns}")
+
+        if "score" not in [col.lower() for col in columns]:
+            columns.append("score")
+
+        # The lexical pre-score is computed locally and never asked of the LLM
+        if self.LOCAL_SCORE_COLUMN not in columns:
+            columns.append(self.LOCAL_SCORE_COLUMN)
+
+        return columns
+
+    def _create_job_table(self, cursor, table_name, columns, jd_text, jd_summary=None):
+        # Ensure private.jobDesc table exists
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.jobDesc (
+                id SERIAL PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                jd_content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        self._ensure_job_desc_summary(cursor)
 
-            temp_file_path = os.path.join(TEMP_DIR, f"{uuid.uuid4()}.pdf")
+        cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
 
-            if self._is_google_drive_url(pdf_url):
-                file_id = self._get_google_drive_file_id(pdf_url)
-                if not file_id:
-                    raise Exception("Invalid Google Drive URL")
+        create_table_columns = ", ".join([f'"{col}" TEXT' for col in columns])
+        create_table_sql = f"""
+            CREATE TABLE "{table_name}" (
+                id SERIAL PRIMARY KEY,
+                {create_table_columns},
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        print(f"Debug: CREATE TABLE SQL: {create_table_sql}")
+        cursor.execute(create_table_sql)
+        current_timestamp = datetime.now()
+        # the table is rebuilt from scratch, so is its JD
+        cursor.execute(
+            "DELETE FROM private.jobDesc WHERE table_name = %s", (table_name,)
+        )
+        cursor.execute(
+            "INSERT INTO private.jobDesc (table_name, jd_content, jd_summary, created_at) VALUES (%s, %s, %s, %s)",
+            (table_name, jd_text, jd_summary, current_timestamp),
+        )
+        with self._jd_summaries_lock:
+            self._jd_summaries.pop(table_name, None)
 
-                gdown.download(
-                    f"https://drive.google.com/uc?id={file_id}",
-                    temp_file_path,
-                    quiet=False,
+    def _ensure_job_desc_summary(self, cursor):
+        """
+        Adds the jd_summary column and table_name index to private.jobDesc and
+        syncs its id sequence with the existing rows
+        """
+        cursor.execute(
+            "ALTER TABLE private.jobDesc ADD COLUMN IF NOT EXISTS jd_summary TEXT"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS jobdesc_table_name ON private.jobDesc (table_name)"
+        )
+        # rows inserted with an explicit id leave the serial sequence behind,
+        # move it past MAX(id) (never backwards, nextval is always fresh)
+        cursor.execute(
+            """
+            SELECT setval(
+                pg_get_serial_sequence('private.jobDesc', 'id'),
+                GREATEST(
+                    COALESCE(MAX(id), 0),
+                    nextval(pg_get_serial_sequence('private.jobDesc', 'id'))
                 )
+            )
+            FROM private.jobDesc
+            """
+        )
 
-                if (
-                    not os.path.exists(temp_file_path)
-                    or os.path.getsize(temp_file_path) == 0
-                ):
-                    raise Exception("Failed to download file from Google Drive")
-            else:
-                response = requests.get(pdf_url)
-                if response.status_code != 200:
-                    raise Exception(f"Failed to download PDF: {response.status_code}")
+    def _get_job_table_columns(self, cursor, table_name):
+        """Candidate columns of an existing job table (without id / created_at)"""
+        cursor.execute(
+            """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+            AND table_name = %s
+            ORDER BY ordinal_position
+        """,
+            (table_name,),
+        )
+        return [
+            row[0] for row in cursor.fetchall() if row[0] not in ("id", "created_at")
+        ]
+
+    def _lock_ingestion(self, connection, table_name):
+        """
+        Cursor on connection once it holds the ingestion lock of table_name.
+        Raises, without touching the run's status, if another connection
+        (another job, worker or process) is already ingesting the table.
+        """
+        cursor = connection.cursor()
+        if not self.checkpoints.try_lock(cursor, table_name):
+            cursor.close()
+            connection.close()
+            raise Exception(f"Ingestion into {table_name} is already in progress")
+        return cursor
+
+    def claim_ingestion_run(self, table_name, include_failed=True):
+        """The run of table_name if this caller may resume it, else None"""
+        try:
+            connection = self._get_db_connection()
+            cursor = connection.cursor()
+            self.checkpoints.ensure_tables(cursor)
+            connection.commit()
+            run = self.checkpoints.claim_run(cursor, table_name, include_failed)
+            connection.commit()
+            cursor.close()
+            connection.close()
+            return run
+        except Exception as e:
+            raise Exception(f"Error claiming ingestion run: {str(e)}")
+
+    def release_ingestion_run(self, table_name):
+        """Puts a claimed run that could not be resumed back to failed"""
+        try:
+            connection = self._get_db_connection()
+            cursor = connection.cursor()
+            self.checkpoints.finish_run(cursor, table_name, "failed")
+            connection.commit()
+            cursor.close()
+            connection.close()
+        except Exception as e:
+            raise Exception(f"Error releasing ingestion run: {str(e)}")
 
-                with open(temp_file_path, "wb") as temp_file:
-                    temp_file.write(response.content)
+    def get_ingestion_run(self, table_name):
+        try:
+            connection = self._get_db_connection()
+            cursor = connection.cursor()
+            self.checkpoints.ensure_tables(cursor)
+            connection.commit()
+            run = self.checkpoints.get_run(cursor, table_name)
+            cursor.close()
+            connection.close()
+            return run
+        except Exception as e:
+            raise Exception(f"Error getting ingestion run: {str(e)}")
 
-            pdf_reader = PdfReader(temp_file_path)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
+    def get_incomplete_ingestion_runs(self):
+        try:
+            connection = self._get_db_connection()
+            cursor = connection.cursor()
+            self.checkpoints.ensure_tables(cursor)
+            connection.commit()
+            runs = self.checkpoints.incomplete_runs(cursor)
+            cursor.close()
+            connection.close()
+            return runs
+        except Exception as e:
+            raise Exception(f"Error getting incomplete ingestion runs: {str(e)}")
 
-            os.unlink(temp_file_path)
-            return text
+    def get_job_description_text(self, table_name):
+        """Raw JD text stored for a job table at ingestion time"""
+        try:
+            connection = self._get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT jd_content
+                FROM private.jobDesc
+                WHERE table_name = %s
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                (table_name,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            connection.close()
+            return row[0] if row else None
+        except Exception as e:
+            raise Exception(f"Error getting job description: {str(e)}")
 
+    def _reference_resumes(self):
+        """
+        Up to PRESCORE_CORPUS_SIZE stored resumes, the corpus the local
+        pre-score takes its IDF and average length from
+        """
+        limit = int(os.getenv("PRESCORE_CORPUS_SIZE", 500))
+        try:
+            connection = self._get_db_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(
+                    """
+                    SELECT resume_text FROM private.candidates
+                    WHERE resume_text IS NOT NULL AND resume_text <> ''
+                    LIMIT %s
+                    """,
+                    (limit,),
+                )
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                connection.close()
         except Exception as e:
+            print(f"Could not load resumes for the pre-score corpus: {str(e)}")
+            return []
 
-            if "temp_file_path" in locals() and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as cleanup_error:
-                    print(
-                        f"Error cleaning up temporary file {temp_file_path}: {cleanup_error}"
+    def _iter_candidate_rows(
+        self, candidates, counts, job=None, cursor=None, table_name=None
+    ):
+        """
+        Yields candidate rows chunk by chunk. When a cursor is given, rows that
+        already have a checkpoint for table_name are looked up per chunk and
+        skipped.
+        """
+        chunks = [candidates] if isinstance(candidates, pd.DataFrame) else candidates
+        for chunk in chunks:
+            rows = chunk.to_dict("records")
+            if cursor is not None:
+                keys = [self.checkpoints.candidate_key(row) for row in rows]
+                done = self.checkpoints.existing_keys(cursor, table_name, keys)
+                if done:
+                    rows = [row for row, key in zip(rows, keys) if key not in done]
+                    print(f"{len(done)} candidates already ingested, skipping them")
+                    if job:
+                        job.add_skipped(len(done))
+
+            counts["total"] += len(rows)
+            if job:
+                job.add_total(len(rows))
+            for row in rows:
+                yield row
+        if job:
+            job.finish_intake()
+
+    @staticmethod
+    def _table_row(candidate_info, columns):
+        values = []
+        for col in columns:
+            value = candidate_info.get(col, "")
+            if value is None:
+                # a candidate the LLM did not score has no score at all
+                values.append(None if col == "score" else "")
+            else:
+                values.append(str(value))
+        return tuple(values)
+
+    @staticmethod
+    def _batched(items, size):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _process_candidate_batch(
+        self, batch, jd_text, columns, pipeline, scorer, duplicates
+    ):
+        """
+        Processes a batch of (index, row) pairs on a pipeline worker and returns
+        (index, row, (resume_text, candidate_info, duplicate), error) for each
+        of them. Resumes that are near-duplicates of one seen earlier in the
+        run come back with candidate_info None and duplicate set to
+        (first_candidate_key, similarity) without any scoring; the others are
+        reserved in the near-duplicate index under their candidate key and
+        scored with _score_candidates.
+        """
+        outcomes = []
+        fetched = []
+        for index, row in batch:
+            try:
+                resume_text = self._fetch_resume_text(row["pdf_url"], pipeline)
+            except Exception as e:
+                outcomes.append((index, row, None, e))
+                continue
+
+            duplicate = duplicates.find(
+                self.checkpoints.candidate_key(row), resume_text
+            )
+            if duplicate:
+                print(
+                    f"Candidate {index + 1} is a near-duplicate (similarity {duplicate[1]}), skipping"
+                )
+                outcomes.append((index, row, (resume_text, None, duplicate), None))
+            else:
+                fetched.append((index, row, resume_text))
+
+        return outcomes + self._score_candidates(
+            fetched, jd_text, columns, pipeline, scorer
+        )
+
+    def _score_candidates(self, fetched, jd_text, columns, pipeline, scorer):
+        """
+        Scores (index, row, resume_text) triples and returns (index, row,
+        (resume_text, candidate_info, None), error) for each of them. Every
+        resume is first scored locally against the JD; resumes below the
+        pre-score threshold keep that score and skip the LLM stage. Batches of
+        more than one remaining candidate share a single extraction + scoring
+        LLM call; candidates the batch response does not cover fall back to the
+        per-candidate calls.
+        """
+        if not fetched:
+            return []
+
+        outcomes = []
+        llm_columns = [col for col in columns if col != self.LOCAL_SCORE_COLUMN]
+        local_scores = scorer.prescore([resume_text for _, _, resume_text in fetched])
+
+        to_score = []
+        for (index, row, resume_text), (local_score, relevant) in zip(
+            fetched, local_scores
+        ):
+            if relevant:
+                to_score.append((index, row, resume_text, local_score))
+                continue
+            print(
+                f"Local score {local_score} below {scorer.threshold} for candidate {index + 1}, skipping LLM scoring"
+            )
+            # the LLM match score is left NULL, the lexical score is on
+            # another scale and only kept in its own column
+            candidate_info = {col: "" for col in llm_columns}
+            candidate_info["name"] = row["name"]
+            candidate_info["score"] = None
+            candidate_info[self.LOCAL_SCORE_COLUMN] = str(local_score)
+            outcomes.append((index, row, (resume_text, candidate_info, None), None))
+
+        batch_infos = [None] * len(to_score)
+        if len(to_score) > 1:
+            with pipeline.llm_slot():
+                batch_infos = self._extract_and_score_batch(
+                    [resume_text for _, _, resume_text, _ in to_score],
+                    jd_text,
+                    llm_columns,
+                )
+
+        for (index, row, resume_text, local_score), candidate_info in zip(
+            to_score, batch_infos
+        ):
+            try:
+                if candidate_info is None:
+                    if len(to_score) > 1:
+                        print(
+                            f"Batch result missing for candidate {index + 1}, falling back"
+                        )
+                    candidate_info = self._score_resume(
+                        resume_text, jd_text, llm_columns, pipeline
                     )
+                candidate_info[self.LOCAL_SCORE_COLUMN] = str(local_score)
+                outcomes.append((index, row, (resume_text, candidate_info, None), None))
+            except Exception as e:
+                outcomes.append((index, row, None, e))
+
+        return outcomes
+
+    def _fetch_resume_text(self, pdf_url, pipeline=None):
+        """
+        Returns the text of the resume at pdf_url, going through the resume
+        cache: fresh URL hits skip the network, stale ones are revalidated and
+        already-seen PDF bytes skip parsing.
+        """
+        cached = self.resume_cache.lookup_url(pdf_url)
+        if cached and cached["fresh"]:
+            print(f"Resume cache hit for {pdf_url}")
+            return cached["text"]
+
+        with pipeline.download_slot() if pipeline else nullcontext():
+            pdf_bytes, validators = self._download_resume(pdf_url, cached)
+
+        if pdf_bytes is None:
+            self.resume_cache.revalidated(pdf_url)
+            return cached["text"]
+
+        content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        resume_text = self.resume_cache.get_text(content_hash)
+        if resume_text is None:
+            with pipeline.parse_slot() if pipeline else nullcontext():
+                resume_text = self._extract_resume_text(pdf_bytes)
+
+        self.resume_cache.put(pdf_url, content_hash, resume_text, **validators)
+        print(f"Resume text extracted, length: {len(resume_text)} characters")
+        return resume_text
+
+    def _score_resume(self, resume_text, jd_text, columns, pipeline):
+        with pipeline.llm_slot():
+            candidate_info = self._extract_candidate_info_for_jd(
+                resume_text, jd_text, columns
+            )
+        print(f"Candidate info extracted: {list(candidate_info.keys())}")
+
+        with pipeline.llm_slot():
+            score = self._calculate_score(candidate_info, jd_text)
+        candidate_info["score"] = str(score)
+        print(f"Match score: {score}")
+        return candidate_info
+
+    def _download_and_extract_resume(self, pdf_url):
+        return self._fetch_resume_text(pdf_url)
+
+    def _download_resume(self, pdf_url, cached=None):
+        """
+        Downloads a resume PDF and returns (pdf_bytes, validators). When a
+        cached entry is passed its validators are sent along and pdf_bytes is
+        None if the server answers 304 Not Modified.
+        """
+        try:
+            return self.downloader.download(pdf_url, cached)
+        except Exception as e:
+            raise Exception(f"Error downloading or processing PDF: {str(e)}")
+
+    def _extract_resume_text(self, pdf_bytes):
+        try:
+            return self.pdf_extractor.extract_text(pdf_bytes)
+        except Exception as e:
             raise Exception(f"Error downloading or processing PDF: {str(e)}")
 
     def _extract_candidate_info(self, resume_text):
         try:
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[
+            response = llm_gateway.complete(
+                [
                     {
                         "role": "user",
                         "content": f"Extract candidate information from this resume:\n{resume_text}\nReturn ONLY a JSON object with the extracted information. Structure the JSON with relevant keys like 'name', 'email', 'phone', 'linkedin', 'skills', 'experience', 'education'. Ensure the output is ONLY the JSON object, for example: {{ \"name\": \"John Doe\", \"email\": \"john.doe@example.com\" }}. Do NOT include any other text or formatting before or after the JSON.",
                     }
                 ],
-                api_key=os.getenv("GOOGLE_API_KEY"),
+                temperature=0,
             )
 
-            llm_output_content = response.choices[0].message.content.strip()
+            llm_output_content = response.strip()
             print(f"Debug: Raw LLM output for candidate info: {llm_output_content}")
 
             if llm_output_content.startswith("```json"):
@@ -742,7 +1436,9 @@ class ChatService:
     def _extract_candidate_info_for_jd(self, resume_text, jd_text, required_columns):
 
         try:
-            columns_str = ", ".join(required_columns[:-1])
+            columns_str = ", ".join(
+                [col for col in required_columns if col.lower() != "score"]
+            )
 
             prompt = f"""
             Extract candidate information from this resume based on the job description requirements.
@@ -765,13 +1461,9 @@ class ChatService:
             Return ONLY the JSON object, no other text.
             """
 
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
+            response = llm_gateway.complete(prompt, temperature=0, priority=BACKGROUND)
 
-            llm_output_content = response.choices[0].message.content.strip()
+            llm_output_content = response.strip()
             print(
                 f"Debug: Raw LLM output for JD-specific candidate info: {llm_output_content[:200]}..."
             )
@@ -801,19 +1493,95 @@ class ChatService:
         except Exception as e:
             raise Exception(f"Error extracting JD-specific candidate info: {str(e)}")
 
+    def _extract_and_score_batch(self, resume_texts, jd_text, required_columns):
+        """
+        Extracts the JD-specific fields and the match score for several resumes
+        in one LLM call. Returns one candidate_info dict (with "score") per
+        resume, or None for every resume whose entry could not be parsed.
+        """
+        try:
+            columns_str = ", ".join(
+                [col for col in required_columns if col.lower() != "score"]
+            )
+            resumes_block = "\n\n".join(
+                [
+                    f'<resume candidate_id="C{i + 1}">\n{resume_text}\n</resume>'
+                    for i, resume_text in enumerate(resume_texts)
+                ]
+            )
+
+            prompt = f"""
+            You will evaluate {len(resume_texts)} candidates against one job description.
+
+            Job Description:
+            {jd_text}
+
+            Resumes:
+            {resumes_block}
+
+            For EACH resume:
+            1. Extract information for these specific fields: {columns_str}
+               For skills, include relevant technical skills, programming languages, frameworks, tools mentioned.
+               For experience, summarize relevant work history and projects.
+               For education, include degrees, certifications, relevant coursework.
+            2. Calculate a match score (0-100) between the candidate and the job description as a number.
+
+            Return ONLY a JSON array with one object per resume, in the same order, for example:
+            [{{"candidate_id": "C1", "name": "John Doe", "skills": "Python, AWS", "score": 82.5}}]
+
+            Return ONLY the JSON array, no other text.
+            """
+
+            response = llm_gateway.complete(prompt, temperature=0, priority=BACKGROUND)
+
+            llm_output_content = response.strip()
+            if llm_output_content.startswith("```json"):
+                llm_output_content = llm_output_content[len("```json") :].lstrip()
+            if llm_output_content.endswith("```"):
+                llm_output_content = llm_output_content[: -len("```")].rstrip()
+
+            entries = json.loads(llm_output_content)
+            if not isinstance(entries, list):
+                raise ValueError("Expected a JSON array")
+        except Exception as e:
+            print(f"Batch extraction failed, falling back to per-candidate calls: {e}")
+            return [None] * len(resume_texts)
+
+        by_id = {}
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get("candidate_id"):
+                by_id[str(entry.pop("candidate_id")).strip()] = entry
+
+        results = []
+        for i in range(len(resume_texts)):
+            candidate_info = by_id.get(f"C{i + 1}")
+            try:
+                score = float(candidate_info.pop("score"))
+            except Exception:
+                results.append(None)
+                continue
+
+            for col in required_columns:
+                if col != "score" and col not in candidate_info:
+                    candidate_info[col] = ""
+            candidate_info["score"] = str(score)
+            results.append(candidate_info)
+
+        return results
+
     def _calculate_score(self, candidate_info, jd_text):
         try:
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[
+            response = llm_gateway.complete(
+                [
                     {
                         "role": "user",
                         "content": f"Calculate a match score (0-100) between this candidate and job description. Return ONLY the score number as a float.\nCandidate: {json.dumps(candidate_info)}\nJob Description: {jd_text}",
                     }
                 ],
-                api_key=os.getenv("GOOGLE_API_KEY"),
+                temperature=0,
+                priority=BACKGROUND,
             )
-            return float(response.choices[0].message.content.strip())
+            return float(response.strip())
         except Exception as e:
             raise Exception(f"Error calculating score: {str(e)}")
 
@@ -887,18 +1655,7 @@ class ChatService:
             connection = self._get_db_connection()
             cursor = connection.cursor()
 
-            cursor.execute(
-                """
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_schema = 'public' 
-                AND table_name = %s
-                ORDER BY ordinal_position
-            """,
-                (table_name,),
-            )
-            columns_result = cursor.fetchall()
-            columns = [row[0] for row in columns_result]
+            columns = self.table_metadata.column_names(table_name)
 
             cursor.execute(f'SELECT * FROM "{table_name}"')
             data_result = cursor.fetchall()
@@ -1075,13 +1832,9 @@ class ChatService:
         """
 
         # Step 2: Get response from LLM
-        response = litellm.completion(
-            model="gemini/gemini-2.0-flash",
-            messages=[{"role": "user", "content": prompt}],
-            api_key=os.getenv("GOOGLE_API_KEY"),
-        )
+        response = llm_gateway.complete(prompt)
 
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = response.strip()
         raw_output = raw_output.replace("```json", "").replace("```", "").strip()
         print("LLM Email Composer Raw Output:", raw_output)
 
@@ -1145,13 +1898,9 @@ class ChatService:
             """
 
         try:
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
+            response = llm_gateway.complete(prompt, temperature=0)
 
-            raw_output = response.choices[0].message.content.strip()
+            raw_output = response.strip()
             raw_output = raw_output.replace("```json", "").replace("```", "").strip()
             print("LLM Calendar Event Raw Output:", raw_output)
 
@@ -1197,59 +1946,121 @@ class ChatService:
             }
 
     def get_job_description(self, table_name):
+        """
+        Bullet-point summary of the table's JD. It is generated at ingestion
+        and stored next to jd_content; tables ingested before that get it
+        generated and stored on first read. Served from an in-process LRU
+        of JD_SUMMARY_CACHE_SIZE tables whose entries are checked against
+        the id of the table's jobDesc row at most every JD_SUMMARY_TTL
+        seconds, so a rebuild by another worker is picked up within the TTL.
+        """
+        now = time.monotonic()
+        with self._jd_summaries_lock:
+            entry = self._jd_summaries.get(table_name)
+            if entry and now - entry["checked_at"] < self.jd_summary_ttl:
+                self._jd_summaries.move_to_end(table_name)
+                return entry["summary"]
+
         try:
             connection = self._get_db_connection()
             cursor = connection.cursor()
+            try:
+                if not self._jd_schema_ready:
+                    self._ensure_job_desc_summary(cursor)
+                    connection.commit()
+                    self._jd_schema_ready = True
+                if entry:
+                    cursor.execute(
+                        """
+                        SELECT id FROM private.jobDesc
+                        WHERE table_name = %s
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                        """,
+                        (table_name,),
+                    )
+                    row = cursor.fetchone()
+                    if row and row[0] == entry["id"]:
+                        connection.commit()
+                        with self._jd_summaries_lock:
+                            entry["checked_at"] = now
+                        return entry["summary"]
 
-            cursor.execute(
-                f"""
-                SELECT jd_content 
-                FROM private.jobDesc 
-                WHERE table_name = %s
-                """,
-                (table_name,),
-            )
-            jd_data = cursor.fetchall()
-
-            prompt = f"""
-                You are an AI assistant that summarizes job descriptions into concise, point-wise highlights.
+                cursor.execute(
+                    """
+                    SELECT id, jd_content, jd_summary
+                    FROM private.jobDesc
+                    WHERE table_name = %s
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                    """,
+                    (table_name,),
+                )
+                row = cursor.fetchone()
+                if not row:
+                    connection.commit()
+                    with self._jd_summaries_lock:
+                        self._jd_summaries.pop(table_name, None)
+                    return None
 
-                Given the following job description, extract only the most important and relevant features about the role.
+                jd_id, jd_content, jd_summary = row
+                if not jd_summary:
+                    jd_summary = self._summarize_job_description(jd_content)
+                    cursor.execute(
+                        "UPDATE private.jobDesc SET jd_summary = %s WHERE id = %s",
+                        (jd_summary, jd_id),
+                    )
+                connection.commit()
+            finally:
+                cursor.close()
+                connection.close()
 
-                Instructions:
-                - Write the output as a clear, bullet-point list
-                - Focus on key details such as:
-                    - Job role and responsibilities
-                    - Required skills and technologies
-                    - Experience level and qualifications
-                    - Location or remote flexibility (if mentioned)
-                    - Any unique perks or company culture highlights
-                - Do NOT copy full sentences or unnecessary filler text
-                - Keep each point short and to the point
+            with self._jd_summaries_lock:
+                self._jd_summaries[table_name] = {
+                    "id": jd_id,
+                    "summary": jd_summary,
+                    "checked_at": now,
+                }
+                self._jd_summaries.move_to_end(table_name)
+                while len(self._jd_summaries) > self.jd_summary_cache_size:
+                    self._jd_summaries.popitem(last=False)
+            return jd_summary
 
-                Job Description:
-                \"\"\"{jd_data}\"\"\"
+        except Exception as e:
+            traceback.print_exc()
+            raise Exception(f"Error getting job description: {str(e)}")
 
-                Now return the summary as bullet points:
-            """
+    def _summarize_job_description(self, jd_text, priority=INTERACTIVE):
+        prompt = f"""
+            You are an AI assistant that summarizes job descriptions into concise, point-wise highlights.
 
-            # tables = [row[0] for row in jd_data]
-            response = litellm.completion(
-                model="gemini/gemini-2.0-flash",
-                messages=[{"role": "user", "content": prompt}],
-                api_key=os.getenv("GOOGLE_API_KEY"),
-            )
+            Given the following job description, extract only the most important and relevant features about the role.
 
-            raw_output = response.choices[0].message.content.strip()
+            Instructions:
+            - Write the output as a clear, bullet-point list
+            - Focus on key details such as:
+                - Job role and responsibilities
+                - Required skills and technologies
+                - Experience level and qualifications
+                - Location or remote flexibility (if mentioned)
+                - Any unique perks or company culture highlights
+            - Do NOT copy full sentences or unnecessary filler text
+            - Keep each point short and to the point
 
-            cursor.close()
-            connection.close()
+            Job Description:
+            \"\"\"{jd_text}\"\"\"
 
-            return raw_output
+            Now return the summary as bullet points:
+        """
+        return llm_gateway.complete(prompt, temperature=0, priority=priority).strip()
 
+    def _summarize_job_description_safely(self, jd_text):
+        # ingestion goes on without a summary, it is then generated on read
+        try:
+            return self._summarize_job_description(jd_text, priority=BACKGROUND)
         except Exception as e:
-            traceback.print_exc()
-            raise Exception(f"Error getting job description: {str(e)}")
+            print(f"Could not summarize job description: {str(e)}")
+            return None
 
     def get_highlighted_resume(self, rephrased_query, table_name):
         # Step 1: Compose prompt to extract name + draft email
@@ -1267,13 +2078,9 @@ class ChatService:
         """
 
         # Step 2: Get response from LLM
-        response = litellm.completion(
-            model="gemini/gemini-2.0-flash",
-            messages=[{"role": "user", "content": prompt}],
-            api_key=os.getenv("GOOGLE_API_KEY"),
-        )
+        response = llm_gateway.complete(prompt, temperature=0, stage="bestfit_name")
 
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = response.strip()
         raw_output = raw_output.replace("```json", "").replace("```", "").strip()
         print("LLM Email Composer Raw Output:", raw_output)
 
@@ -1335,13 +2142,11 @@ class ChatService:
                     """
 
                     # Step 2: Get response from LLM
-                    response = litellm.completion(
-                        model="gemini/gemini-2.0-flash",
-                        messages=[{"role": "user", "content": prompt}],
-                        api_key=os.getenv("GOOGLE_API_KEY"),
+                    response = llm_gateway.complete(
+                        prompt, temperature=0, stage="bestfit_highlights"
                     )
 
-                    raw_output = response.choices[0].message.content.strip()
+                    raw_output = response.strip()
                     raw_output = (
                         raw_output.replace("```json", "").replace("```", "").strip()
                     )
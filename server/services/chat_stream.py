@@ -0,0 +1,111 @@
+import ast
+import json
+import queue
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_events(run, then=None):
+    """
+    Runs run(emit) on a background thread and yields its progress as SSE
+    messages. emit(event, data) sends one event; the return value of run is
+    sent as a "result" event, an exception as an "error" event. then(result,
+    emit), when given, runs after the result went out and can send trailing
+    events before the stream closes.
+    """
+    events = queue.Queue()
+
+    def emit(event, data=None):
+        events.put((event, data if data is not None else {}))
+
+    def target():
+        try:
+            result = run(emit)
+            events.put(("result", result))
+            if then:
+                then(result, emit)
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=target, daemon=True).start()
+
+    # flush headers right away so the client sees the first byte immediately
+    yield ": stream opened\n\n"
+    while True:
+        item = events.get()
+        if item is None:
+            break
+        yield format_sse(*item)
+
+
+class ChatStreamCallbackHandler(BaseCallbackHandler):
+    """
+    Forwards SQL agent progress to emit(): "sql" when a query starts running,
+    "rows" with the row count when it returns and "token" for the text the
+    chat model streams for the answer.
+
+    Only the agent's final answer is streamed: tokens of LLM calls made
+    inside a tool (the query checker) are dropped, and a model turn that
+    ends up calling a tool after streaming text sends "reset" so the client
+    discards that text.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._tools = {}
+        self._streamed = set()
+        self._tool_turns = set()
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._tools[run_id] = name
+        if name == "sql_db_query":
+            self.emit("sql", {"status": "running", "query": input_str})
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        if self._tools.pop(run_id, None) != "sql_db_query":
+            return
+        try:
+            rows = len(ast.literal_eval(str(output))) if output else 0
+        except (ValueError, SyntaxError):
+            rows = None
+        self.emit("rows", {"count": rows})
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        self._tools.pop(run_id, None)
+
+    def on_llm_new_token(self, token, chunk=None, run_id=None, **kwargs):
+        # the agent runs one tool at a time, LLM calls meanwhile belong to it
+        if self._tools or run_id in self._tool_turns:
+            return
+        message = getattr(chunk, "message", None)
+        if getattr(message, "tool_call_chunks", None) or getattr(
+            message, "tool_calls", None
+        ):
+            self._tool_turn(run_id)
+            return
+        if isinstance(token, str) and token:
+            self._streamed.add(run_id)
+            self.emit("token", {"text": token})
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        for generations in response.generations or []:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if getattr(message, "tool_calls", None):
+                    self._tool_turn(run_id)
+        self._streamed.discard(run_id)
+        self._tool_turns.discard(run_id)
+
+    def _tool_turn(self, run_id):
+        self._tool_turns.add(run_id)
+        if run_id in self._streamed:
+            self._streamed.discard(run_id)
+            self.emit("reset")
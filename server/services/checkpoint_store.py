@@ -0,0 +1,165 @@
+import hashlib
+
+
+class CheckpointStore:
+    """
+    Tracks ingestion runs and the candidates each run has already written, so
+    an interrupted run can be resumed without redoing finished candidates.
+
+    private.ingestion_runs holds one row per job table (status and the path of
+    the uploaded CSV), and the connection ingesting a table holds an advisory
+    lock on it (try_lock); private.ingestion_checkpoints holds one row per
+    (table, candidate key) and is written in the same transaction as the
+    candidate's own rows (see BulkWriter), so a checkpoint exists iff the
+    candidate was stored. private.ingestion_duplicates links near-duplicate
+    candidates to the first candidate of the table with the same resume.
+    """
+
+    CHECKPOINT_TABLE = "private.ingestion_checkpoints"
+    DUPLICATE_TABLE = "private.ingestion_duplicates"
+
+    def ensure_tables(self, cursor):
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.ingestion_runs (
+                table_name TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                csv_path TEXT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.ingestion_checkpoints (
+                table_name TEXT NOT NULL,
+                candidate_key TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (table_name, candidate_key)
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.ingestion_duplicates (
+                table_name TEXT NOT NULL,
+                candidate_key TEXT NOT NULL,
+                duplicate_of TEXT NOT NULL,
+                name TEXT,
+                resume_link TEXT,
+                similarity REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (table_name, candidate_key)
+            )
+        """
+        )
+
+    @staticmethod
+    def candidate_key(row):
+        return hashlib.sha256(str(row["pdf_url"]).strip().encode("utf-8")).hexdigest()
+
+    def start_run(self, cursor, table_name, csv_path=None, reset=False):
+        if reset:
+            # a rebuilt table starts without checkpoints or duplicate links
+            cursor.execute(
+                "DELETE FROM private.ingestion_checkpoints WHERE table_name = %s",
+                (table_name,),
+            )
+            cursor.execute(
+                "DELETE FROM private.ingestion_duplicates WHERE table_name = %s",
+                (table_name,),
+            )
+        cursor.execute(
+            """
+            INSERT INTO private.ingestion_runs (table_name, status, csv_path, started_at, finished_at)
+            VALUES (%s, 'running', %s, CURRENT_TIMESTAMP, NULL)
+            ON CONFLICT (table_name) DO UPDATE SET
+                status = 'running',
+                csv_path = COALESCE(excluded.csv_path, private.ingestion_runs.csv_path),
+                started_at = CURRENT_TIMESTAMP,
+                finished_at = NULL
+            """,
+            (table_name, csv_path),
+        )
+
+    def finish_run(self, cursor, table_name, status):
+        cursor.execute(
+            """
+            UPDATE private.ingestion_runs
+            SET status = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE table_name = %s
+            """,
+            (status, table_name),
+        )
+
+    def get_run(self, cursor, table_name):
+        cursor.execute(
+            "SELECT status, csv_path FROM private.ingestion_runs WHERE table_name = %s",
+            (table_name,),
+        )
+        row = cursor.fetchone()
+        return {"status": row[0], "csv_path": row[1]} if row else None
+
+    def incomplete_runs(self, cursor):
+        """
+        Runs left "running" or "resuming", i.e. interrupted or still going;
+        failed runs are only resumed on request
+        """
+        cursor.execute(
+            "SELECT table_name, csv_path FROM private.ingestion_runs WHERE status IN ('running', 'resuming')"
+        )
+        return [{"table_name": row[0], "csv_path": row[1]} for row in cursor.fetchall()]
+
+    @staticmethod
+    def try_lock(cursor, table_name):
+        """
+        Session advisory lock held by the connection ingesting table_name.
+        It is released when that connection closes, also when the process
+        dies, so a run left "running" without its lock was interrupted.
+        """
+        cursor.execute(
+            "SELECT pg_try_advisory_lock(hashtext(%s))", (f"ingestion:{table_name}",)
+        )
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def unlock(cursor, table_name):
+        cursor.execute(
+            "SELECT pg_advisory_unlock(hashtext(%s))", (f"ingestion:{table_name}",)
+        )
+
+    def claim_run(self, cursor, table_name, include_failed=True):
+        """
+        Marks an interrupted run, or a failed one with include_failed, as
+        "resuming" and returns its run, or None if it is completed, already
+        claimed or still being ingested by a live connection.
+        """
+        statuses = ["running", "resuming"] + (["failed"] if include_failed else [])
+        if not self.try_lock(cursor, table_name):
+            return None
+        try:
+            cursor.execute(
+                """
+                UPDATE private.ingestion_runs SET status = 'resuming'
+                WHERE table_name = %s AND status = ANY(%s)
+                RETURNING status, csv_path
+                """,
+                (table_name, statuses),
+            )
+            row = cursor.fetchone()
+        finally:
+            self.unlock(cursor, table_name)
+        return {"status": row[0], "csv_path": row[1]} if row else None
+
+    def existing_keys(self, cursor, table_name, keys):
+        if not keys:
+            return set()
+        cursor.execute(
+            """
+            SELECT candidate_key FROM private.ingestion_checkpoints
+            WHERE table_name = %s AND candidate_key = ANY(%s)
+            """,
+            (table_name, list(keys)),
+        )
+        return {row[0] for row in cursor.fetchall()}
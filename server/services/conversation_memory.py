@@ -0,0 +1,182 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.llm_gateway import llm_gateway
+from services.llm_scheduler import BACKGROUND
+
+
+class ConversationMemory:
+    """
+    Rolling summary of each chat thread, one row per (user_id, table_id) in
+    private.thread_summaries.
+
+    After every stored turn the summary is rewritten from the previous summary
+    plus that one turn (threads without a summary yet are seeded from their
+    last 10 turns), on a background pool so the answer is not held up. The
+    chat context handed to the rephraser is that summary plus the last
+    recent_turns (CHAT_CONTEXT_RECENT_TURNS) raw turns with answers cut to
+    response_chars (CHAT_CONTEXT_RESPONSE_CHARS), so its size stays constant
+    however long the thread gets.
+    """
+
+    SEED_TURNS = 10
+
+    def __init__(self, connect, recent_turns=None, response_chars=None):
+        self.connect = connect
+        self.recent_turns = (
+            recent_turns
+            if recent_turns is not None
+            else int(os.getenv("CHAT_CONTEXT_RECENT_TURNS", 2))
+        )
+        self.response_chars = response_chars or int(
+            os.getenv("CHAT_CONTEXT_RESPONSE_CHARS", 1000)
+        )
+        self.summary_words = int(os.getenv("CHAT_SUMMARY_WORDS", 150))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("CHAT_SUMMARY_WORKERS", 2)),
+            thread_name_prefix="thread-summary",
+        )
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._table_ready = False
+
+    def ensure_table(self):
+        # created on its own connection so the caller's transaction stays clean
+        if self._table_ready:
+            return
+        connection = self.connect()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS private.thread_summaries (
+                    user_id TEXT NOT NULL,
+                    table_id TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    turns INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, table_id)
+                )
+            """
+            )
+            connection.commit()
+            self._table_ready = True
+        finally:
+            cursor.close()
+            connection.close()
+
+    def get_summary(self, cursor, user_id, table_name):
+        self.ensure_table()
+        cursor.execute(
+            "SELECT summary, turns FROM private.thread_summaries WHERE user_id = %s AND table_id = %s",
+            (str(user_id), table_name),
+        )
+        return cursor.fetchone()
+
+    def recent_turns_of(self, cursor, user_id, table_name, limit):
+        """Last limit (question, response) pairs of the thread, oldest first"""
+        cursor.execute(
+            """
+            SELECT question, response FROM private.threads
+            WHERE user_id = %s AND table_id = %s
+            ORDER BY timestamp DESC
+            LIMIT %s
+        """,
+            (user_id, table_name, limit),
+        )
+        return list(reversed(cursor.fetchall()))
+
+    def _format_turns(self, turns):
+        lines = []
+        for question, response in turns:
+            response = str(response or "")
+            if len(response) > self.response_chars:
+                response = response[: self.response_chars].rstrip() + " …"
+            lines.append(f"User: {question}\nBot: {response}")
+        return "\n".join(lines)
+
+    def build_context(self, connection, user_id, table_name):
+        """Summary plus the most recent raw turns, or None for a new thread"""
+        cursor = connection.cursor()
+        try:
+            turns = self.recent_turns_of(
+                cursor, user_id, table_name, max(self.recent_turns, 1)
+            )
+            if not turns:
+                return None
+            summary = self.get_summary(cursor, user_id, table_name)
+        finally:
+            cursor.close()
+
+        recent = self._format_turns(
+            turns[-self.recent_turns :] if self.recent_turns else []
+        )
+        if not summary:
+            return recent or self._format_turns(turns)
+        return (
+            f"Summary of the earlier conversation:\n{summary[0]}\n\n"
+            f"Most recent messages:\n{recent}"
+        )
+
+    def record_turn(self, user_id, table_name, question, response):
+        """Folds a stored turn into the thread summary in the background"""
+        return self._executor.submit(
+            self._update_summary, user_id, table_name, question, response
+        )
+
+    def _thread_lock(self, user_id, table_name):
+        with self._locks_lock:
+            return self._locks.setdefault((str(user_id), table_name), threading.Lock())
+
+    def _update_summary(self, user_id, table_name, question, response):
+        # updates of one thread are serialised so no turn is folded in twice
+        with self._thread_lock(user_id, table_name):
+            connection = self.connect()
+            cursor = connection.cursor()
+            try:
+                existing = self.get_summary(cursor, user_id, table_name)
+                if existing:
+                    previous, turns = existing
+                    new_turns = [(question, response)]
+                else:
+                    # first summary of the thread, the turn is already stored
+                    previous, turns = "", 0
+                    new_turns = self.recent_turns_of(
+                        cursor, user_id, table_name, self.SEED_TURNS
+                    )
+
+                summary = self._summarize(previous, new_turns)
+                cursor.execute(
+                    """
+                    INSERT INTO private.thread_summaries (user_id, table_id, summary, turns, updated_at)
+                    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (user_id, table_id) DO UPDATE SET
+                        summary = excluded.summary,
+                        turns = excluded.turns,
+                        updated_at = CURRENT_TIMESTAMP
+                    """,
+                    (str(user_id), table_name, summary, turns + len(new_turns)),
+                )
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                print(f"Error updating thread summary: {str(e)}")
+            finally:
+                cursor.close()
+                connection.close()
+
+    def _summarize(self, previous, turns):
+        prompt = f"""
+        You maintain the running summary of a conversation between an HR professional and an assistant that answers questions about candidate data.
+
+        Current summary:
+        {previous or "(empty)"}
+
+        New messages:
+        {self._format_turns(turns)}
+
+        Rewrite the summary so it also covers the new messages. Keep the candidate names, roles, skills, filters, numbers and decisions a later follow-up question could refer to, and drop greetings and formatting.
+        Use at most {self.summary_words} words and return only the summary text.
+        """
+        return llm_gateway.complete(prompt, temperature=0, priority=BACKGROUND).strip()
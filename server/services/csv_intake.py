@@ -0,0 +1,56 @@
+import csv
+import os
+import pandas as pd
+
+REQUIRED_COLUMNS = ["name", "pdf_url"]
+
+
+def validate_csv_header(csv_path):
+    """Raises ValueError if the candidates CSV is missing a required column"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+
+
+def count_csv_rows(csv_path):
+    """
+    Number of non-empty data rows in the CSV, counted with the csv module so
+    quoted multi-line fields count once, without building DataFrames.
+    """
+    with open(csv_path, newline="", encoding="utf-8", errors="replace") as f:
+        return max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+
+
+def iter_candidate_chunks(csv_path, chunksize=None, on_skipped=None):
+    """
+    Streams the candidates CSV in chunks of `chunksize` rows so only one chunk
+    is resident at a time. Each chunk is cleaned with vectorized ops: rows with
+    an empty name or a non-http(s) pdf_url are dropped, as are pdf_urls already
+    seen in this chunk or an earlier one. on_skipped(count) is called with the
+    number of rows dropped from every chunk.
+    """
+    chunksize = chunksize or int(os.getenv("CSV_CHUNK_SIZE", 1000))
+    seen_urls = set()
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str):
+        received = len(chunk)
+
+        chunk["name"] = chunk["name"].str.strip()
+        chunk["pdf_url"] = chunk["pdf_url"].str.strip()
+
+        valid = chunk["name"].fillna("").ne("") & chunk["pdf_url"].str.match(
+            r"^https?://", na=False
+        )
+        chunk = chunk[valid].drop_duplicates(subset="pdf_url")
+        chunk = chunk[~chunk["pdf_url"].isin(seen_urls)]
+        seen_urls.update(chunk["pdf_url"])
+
+        skipped = received - len(chunk)
+        if skipped:
+            print(f"Skipped {skipped} invalid or duplicate CSV rows")
+            if on_skipped:
+                on_skipped(skipped)
+
+        if len(chunk):
+            yield chunk
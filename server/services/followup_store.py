@@ -0,0 +1,52 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class FollowupStore:
+    """
+    Follow-up suggestions generated off the request path.
+
+    submit() starts generating the suggestions for a chat message on a small
+    thread pool (FOLLOWUP_WORKERS) and returns right away; get() looks them up
+    by message id, optionally waiting for them. Only the last max_entries
+    (FOLLOWUP_STORE_SIZE) messages are kept.
+    """
+
+    def __init__(self, max_workers=None, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv("FOLLOWUP_STORE_SIZE", 1024))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("FOLLOWUP_WORKERS", 4)),
+            thread_name_prefix="followups",
+        )
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, message_id, generate):
+        future = self._executor.submit(generate)
+        with self._lock:
+            self._futures[message_id] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+        return future
+
+    def get(self, message_id, timeout=0):
+        """
+        Returns {"status", "followups"} with status "ready", "pending" or
+        "failed", or None when the message id is unknown.
+        """
+        with self._lock:
+            future = self._futures.get(message_id)
+        if future is None:
+            return None
+
+        try:
+            followups = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return {"status": "pending", "followups": []}
+        except Exception as e:
+            print(f"Error generating followups for {message_id}: {str(e)}")
+            return {"status": "failed", "followups": []}
+        return {"status": "ready", "followups": followups}
@@ -0,0 +1,73 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class IngestionPipeline:
+    """
+    Runs candidate ingestion work on a bounded thread pool.
+
+    The pool size caps how many candidates are in flight, while the
+    download / parse / llm slots cap each stage independently so a burst of
+    LLM calls cannot starve downloads (or trip provider quotas).
+    """
+
+    def __init__(
+        self, max_workers=None, download_limit=None, parse_limit=None, llm_limit=None
+    ):
+        self.max_workers = max_workers or int(os.getenv("INGEST_WORKERS", 8))
+        self.download_limit = download_limit or int(
+            os.getenv("INGEST_DOWNLOAD_CONCURRENCY", self.max_workers)
+        )
+        self.parse_limit = parse_limit or int(
+            os.getenv("INGEST_PARSE_CONCURRENCY", os.cpu_count() or 2)
+        )
+        self.llm_limit = llm_limit or int(os.getenv("INGEST_LLM_CONCURRENCY", 4))
+
+        self._download_slots = threading.BoundedSemaphore(self.download_limit)
+        self._parse_slots = threading.BoundedSemaphore(self.parse_limit)
+        self._llm_slots = threading.BoundedSemaphore(self.llm_limit)
+
+    def download_slot(self):
+        return self._download_slots
+
+    def parse_slot(self):
+        return self._parse_slots
+
+    def llm_slot(self):
+        return self._llm_slots
+
+    def run(self, items, worker):
+        """
+        Calls worker(item) for every item and yields (index, item, result, error)
+        in completion order. A failing item yields its exception instead of
+        aborting the run. At most 2 * max_workers items are pulled from the
+        iterable at a time, so generators are consumed lazily.
+        """
+        max_in_flight = self.max_workers * 2
+        items = iter(enumerate(items))
+        pending = {}
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="ingest"
+        ) as executor:
+
+            def submit_next():
+                try:
+                    index, item = next(items)
+                except StopIteration:
+                    return False
+                pending[executor.submit(worker, item)] = (index, item)
+                return True
+
+            while len(pending) < max_in_flight and submit_next():
+                pass
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    error = future.exception()
+                    result = None if error else future.result()
+                    yield index, item, result, error
+                    submit_next()
@@ -3,6 +3,8 @@ import json
 import psycopg2
 from dotenv import load_dotenv
 from urllib.parse import urlparse
+from services.metrics import TimedCursor
+from services.table_metadata import table_metadata
 
 load_dotenv()
 
@@ -28,7 +30,7 @@ class InsightsService:
 
     def _get_connection(self):
         if not self.connection or self.connection.closed:
-            self.connection = psycopg2.connect(**self.db_config)
+            self.connection = psycopg2.connect(**self.db_config, cursor_factory=TimedCursor)
         return self.connection
 
     def generate_insights(self, table_name, data=None):
@@ -36,21 +38,12 @@ class InsightsService:
             conn = self._get_connection()
             cursor = conn.cursor()
 
-            columns_query = """
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_schema = 'public' 
-                AND table_name = %s
-                ORDER BY ordinal_position
-            """
-            cursor.execute(columns_query, (table_name,))
-            columns_result = cursor.fetchall()
+            # column names come from the shared per-table metadata cache
+            columns = table_metadata.column_names(table_name)
             
-            if not columns_result:
+            if not columns:
                 raise Exception(f"No columns found for table {table_name}")
             
-            columns = [row[0] for row in columns_result]
-            
             data_query = f'SELECT * FROM "{table_name}"'
             cursor.execute(data_query)
             data_rows = cursor.fetchall()
@@ -79,43 +72,23 @@ class InsightsService:
 
     def get_table_info(self, table_name):
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            # PostgreSQL equivalent of DESCRIBE
-            structure_query = """
-                SELECT 
-                    column_name as field,
-                    data_type as type,
-                    is_nullable as null,
-                    column_default as default,
-                    character_maximum_length as length
-                FROM information_schema.columns 
-                WHERE table_schema = 'public' 
-                AND table_name = %s
-                ORDER BY ordinal_position
-            """
-            cursor.execute(structure_query, (table_name,))
-            structure = cursor.fetchall()
-            
-            count_query = f'SELECT COUNT(*) FROM "{table_name}"'
-            cursor.execute(count_query)
-            row_count = cursor.fetchone()[0]
-            
-            cursor.close()
+            # PostgreSQL equivalent of DESCRIBE, from the metadata cache
+            metadata = table_metadata.get(table_name)
+            if not metadata:
+                raise Exception(f"No columns found for table {table_name}")
             
             return {
                 "table_name": table_name,
                 "structure": [
                     {
-                        "field": row[0],
-                        "type": row[1],
-                        "null": row[2],
-                        "default": row[3],
-                        "length": row[4]
-                    } for row in structure
+                        "field": column["name"],
+                        "type": column["type"],
+                        "null": column["nullable"],
+                        "default": column["default"],
+                        "length": column["length"]
+                    } for column in metadata["columns"]
                 ],
-                "row_count": row_count
+                "row_count": metadata["row_count"]
             }
             
         except Exception as e:
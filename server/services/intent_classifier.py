@@ -0,0 +1,218 @@
+"""
+Local intent classifier used ahead of the LLM intent detector.
+
+Retrain the linear model after editing the labelled examples with
+
+    python -m services.intent_classifier --train
+"""
+
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+EXAMPLES_PATH = os.path.join(MODELS_DIR, "intent_examples.jsonl")
+MODEL_PATH = os.path.join(MODELS_DIR, "intent_model.json")
+
+NGRAM_RANGE = (2, 4)
+
+# Phrases that narrow the intent down. The model still has to be confident in
+# an intent the rules matched; the action intents need an action verb aimed at
+# a person ("send an email to ...", "schedule an interview with ...").
+RULES = {
+    "gmail": [
+        r"\b(send|write|draft|compose|forward)\b (an? |the |this |that )?(follow-up |rejection |offer |invitation )?(e-?mails?|mails?|message) to\b",
+        r"^(please )?(e-?mail|mail|reply to) (him|her|them|all|every|each|the (candidate|shortlisted|selected|top))\b",
+    ],
+    "calendar": [
+        r"\b(schedule|reschedule|book|arrange|set up)\b (an? |the )?([a-z-]+ )?(interview|meeting|call|slot)s? (with|for)\b",
+    ],
+    "bestfit": [
+        r"\bwhy\b.*\b(is|are|would)\b.*\b(fit|suitable|hire|recommended|qualified|match)\b",
+        r"\b(is|are) [a-z]+ a (good|best|perfect|great|right|strong|better) (fit|match)\b",
+        r"\bhighlight\b.*\bresume\b",
+    ],
+    "sql": [
+        r"^(how many|list|count|show me (the )?(top|all|candidates)|which candidates|filter|rank)\b",
+        r"\btop \d+\b",
+        r"\b(average|highest|lowest|percentage)\b.*\b(score|experience|candidates)\b",
+    ],
+}
+COMPILED_RULES = {
+    intent: [re.compile(pattern) for pattern in patterns]
+    for intent, patterns in RULES.items()
+}
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def char_ngrams(text):
+    padded = f" {normalize(text)} "
+    low, high = NGRAM_RANGE
+    return [
+        padded[i : i + n]
+        for n in range(low, high + 1)
+        for i in range(len(padded) - n + 1)
+    ]
+
+
+class IntentClassifier:
+    """
+    Keyword rules plus a softmax-regression model over character 2-4 grams
+    (models/intent_model.json, trained offline from intent_examples.jsonl).
+    Rules only narrow the candidate intents, the model's probability is
+    always the confidence. predict() returns an intent only when the model
+    is at least `threshold` (INTENT_CONFIDENCE_THRESHOLD) confident in it,
+    and never one of the ACTION_INTENTS: those send email or create events,
+    so they are left for the LLM to confirm. None means fall back to the LLM.
+    """
+
+    ACTION_INTENTS = ("gmail", "calendar")
+
+    def __init__(self, model_path=None, threshold=None):
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", 0.8))
+        )
+        self.labels = []
+        self.vocabulary = {}
+        self.weights = None
+        self.bias = None
+
+        model_path = model_path or MODEL_PATH
+        if os.path.exists(model_path):
+            with open(model_path) as model_file:
+                model = json.load(model_file)
+            self.labels = model["labels"]
+            self.vocabulary = {gram: i for i, gram in enumerate(model["features"])}
+            self.weights = np.array(model["weights"], dtype=float)
+            self.bias = np.array(model["bias"], dtype=float)
+        else:
+            print(f"Intent model not found at {model_path}, using rules only")
+
+    def rule_intents(self, text):
+        text = normalize(text)
+        return {
+            intent
+            for intent, patterns in COMPILED_RULES.items()
+            if any(pattern.search(text) for pattern in patterns)
+        }
+
+    def model_scores(self, text):
+        if self.weights is None:
+            return {}
+        counts = {}
+        for gram in char_ngrams(text):
+            counts[gram] = counts.get(gram, 0) + 1
+        norm = sum(count * count for count in counts.values()) ** 0.5 or 1.0
+
+        logits = self.bias.copy()
+        for gram, count in counts.items():
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                logits += self.weights[index] * (count / norm)
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        return dict(zip(self.labels, probabilities.tolist()))
+
+    def classify(self, text):
+        """
+        Returns (intent, confidence, source). source is "rules" when the
+        intent was picked among the rule matches, "model" otherwise; the
+        confidence is the model's probability either way.
+        """
+        scores = self.model_scores(text)
+        if not scores:
+            return None, 0.0, "model"
+
+        matched = self.rule_intents(text)
+        if matched:
+            # the model picks among the matched intents, unnormalised so a
+            # rule hit alone never makes it confident
+            candidates = {intent: scores.get(intent, 0.0) for intent in matched}
+            intent = max(candidates, key=candidates.get)
+            return intent, candidates[intent], "rules"
+
+        intent = max(scores, key=scores.get)
+        return intent, scores[intent], "model"
+
+    def predict(self, text):
+        intent, confidence, _ = self.classify(text)
+        # "unknown" is never final locally, the LLM may still place the message
+        if intent in (None, "unknown") or intent in self.ACTION_INTENTS:
+            return None
+        if confidence < self.threshold:
+            return None
+        return intent
+
+
+def train(examples_path=EXAMPLES_PATH, epochs=2000, learning_rate=4.0, l2=1e-4):
+    """Fits the softmax model with full-batch gradient descent"""
+    with open(examples_path) as examples_file:
+        examples = [json.loads(line) for line in examples_file if line.strip()]
+
+    labels = sorted({example["intent"] for example in examples})
+    features = sorted(
+        {gram for example in examples for gram in char_ngrams(example["text"])}
+    )
+    vocabulary = {gram: i for i, gram in enumerate(features)}
+
+    X = np.zeros((len(examples), len(features)))
+    y = np.zeros((len(examples), len(labels)))
+    for row, example in enumerate(examples):
+        for gram in char_ngrams(example["text"]):
+            X[row, vocabulary[gram]] += 1
+        y[row, labels.index(example["intent"])] = 1
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+
+    weights = np.zeros((len(features), len(labels)))
+    bias = np.zeros(len(labels))
+    for _ in range(epochs):
+        logits = X @ weights + bias
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        error = (probabilities - y) / len(examples)
+        weights -= learning_rate * (X.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+
+    accuracy = float(np.mean((X @ weights + bias).argmax(axis=1) == y.argmax(axis=1)))
+    return {
+        "labels": labels,
+        "features": features,
+        "weights": np.round(weights, 4).tolist(),
+        "bias": np.round(bias, 4).tolist(),
+        "training_accuracy": round(accuracy, 4),
+        "examples": len(examples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--train", action="store_true", help="retrain the model")
+    parser.add_argument("--examples", default=EXAMPLES_PATH)
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("text", nargs="*", help="messages to classify")
+    args = parser.parse_args()
+
+    if args.train:
+        model = train(args.examples)
+        with open(args.output, "w") as model_file:
+            json.dump(model, model_file, separators=(",", ":"))
+        print(
+            f"Trained on {model['examples']} examples, {len(model['features'])} "
+            f"features, training accuracy {model['training_accuracy']}"
+        )
+
+    classifier = IntentClassifier(args.output)
+    for text in args.text:
+        print(text, "->", classifier.classify(text))
+
+
+if __name__ == "__main__":
+    main()
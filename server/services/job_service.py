@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class IngestionJob:
+    """Progress record for one background ingestion run"""
+
+    MAX_REPORTED_FAILURES = 100
+
+    def __init__(self, table_name):
+        self.job_id = str(uuid.uuid4())
+        self.table_name = table_name
+        self.status = "queued"
+        self.total = 0
+        self.rows = None
+        self.intake_complete = False
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.failures = []
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+
+    def set_rows(self, count):
+        """Data rows of the uploaded CSV, counted before intake starts"""
+        with self._lock:
+            self.rows = count
+
+    def add_total(self, count):
+        with self._lock:
+            self.total += count
+
+    def finish_intake(self):
+        with self._lock:
+            self.intake_complete = True
+
+    def add_skipped(self, count):
+        with self._lock:
+            self.skipped += count
+
+    def candidate_succeeded(self, index, name):
+        with self._lock:
+            self.processed += 1
+
+    def candidate_duplicated(self, index, name):
+        with self._lock:
+            self.duplicates += 1
+
+    def candidate_failed(self, index, name, error):
+        with self._lock:
+            self.failed += 1
+            if len(self.failures) < self.MAX_REPORTED_FAILURES:
+                self.failures.append(
+                    {"index": index, "name": str(name), "error": str(error)}
+                )
+
+    def complete(self, result):
+        with self._lock:
+            self.status = "completed"
+            self.result = result
+            self.finished_at = time.time()
+
+    def fail(self, error):
+        with self._lock:
+            self.status = "failed"
+            self.error = str(error)
+            self.finished_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            done = self.processed + self.failed + self.duplicates
+            # total only grows as CSV chunks are read, so until intake
+            # finishes it is estimated from the counted CSV rows (unknown
+            # without a count) instead of reporting the chunks read so far
+            if self.intake_complete:
+                total = self.total
+            elif self.rows is not None:
+                total = max(self.rows - self.skipped, self.total)
+            else:
+                total = None
+
+            elapsed = None
+            throughput = None
+            eta_seconds = None
+            if self.started_at:
+                elapsed = (self.finished_at or time.time()) - self.started_at
+                if elapsed > 0 and done:
+                    throughput = done / elapsed
+                    if self.status == "running" and total is not None:
+                        eta_seconds = max(total - done, 0) / throughput
+
+            return {
+                "job_id": self.job_id,
+                "table_name": self.table_name,
+                "status": self.status,
+                "total": total,
+                "rows": self.rows,
+                "processed": self.processed,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "duplicates": self.duplicates,
+                "progress": round(done / total, 4) if total else None,
+                "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+                "throughput_per_second": (
+                    round(throughput, 3) if throughput is not None else None
+                ),
+                "eta_seconds": (
+                    round(eta_seconds, 1) if eta_seconds is not None else None
+                ),
+                "failures": list(self.failures),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+            }
+
+
+class IngestionJobService:
+    """
+    Runs ingestion jobs off the request thread and keeps their progress in
+    memory. Finished jobs are kept around for JOB_RETENTION_SECONDS so the
+    client can read the final status.
+    """
+
+    def __init__(self, max_concurrent_jobs=None, retention_seconds=None):
+        self.max_concurrent_jobs = max_concurrent_jobs or int(
+            os.getenv("INGEST_MAX_CONCURRENT_JOBS", 2)
+        )
+        self.retention_seconds = retention_seconds or int(
+            os.getenv("JOB_RETENTION_SECONDS", 24 * 60 * 60)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_jobs, thread_name_prefix="ingest-job"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, table_name, fn, *args, **kwargs):
+        """Schedules fn(*args, job=job, **kwargs) and returns the job right away"""
+        job = IngestionJob(table_name)
+        with self._lock:
+            self._evict_expired()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, table_name=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if table_name:
+            jobs = [job for job in jobs if job.table_name == table_name]
+        return jobs
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.start()
+            result = fn(*args, job=job, **kwargs)
+            job.complete(result)
+        except Exception as e:
+            print(f"Ingestion job {job.job_id} failed: {traceback.format_exc()}")
+            job.fail(e)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from services.llm_replay import completion_backend, get_recordings
+from services.llm_scheduler import INTERACTIVE, LLMScheduler
+from services.metrics import caller_stage, metrics
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini/gemini-2.0-flash"
+WHITESPACE = re.compile(r"\s+")
+
+
+class LLMGateway:
+    """
+    Single entry point for every LLM completion in the server.
+
+    complete() takes a prompt string or a list of chat messages and returns the
+    text of the first choice. Deterministic calls (temperature 0) are cached
+    under sha256(model + whitespace-normalised messages + extra params) in an
+    in-memory LRU of cache_size entries that expire after cache_ttl seconds.
+    When LLM_CACHE_PATH is set the cache is also persisted to that sqlite
+    file, so it survives restarts and is shared between worker processes.
+    Cache misses are admitted through the LLMScheduler (rate limits,
+    priorities, retries) with their priority class.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        cache_size=None,
+        cache_ttl=None,
+        disk_path=None,
+        scheduler=None,
+        completion=None,
+    ):
+        self.model = model or os.getenv("LLM_MODEL", DEFAULT_MODEL)
+        self.scheduler = scheduler or LLMScheduler()
+        # litellm.completion, or the offline record/replay backend (LLM_BACKEND)
+        self.completion = completion or completion_backend()
+        self.completion_tokens_estimate = int(
+            os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", 512)
+        )
+        self.cache_size = cache_size or int(os.getenv("LLM_CACHE_SIZE", 2048))
+        self.cache_ttl = cache_ttl or int(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60))
+        self.disk_path = disk_path or os.getenv("LLM_CACHE_PATH")
+        # LLM_CACHE_ENABLED=false sends every call to the provider (benchmarks)
+        self.cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "uncached": 0}
+
+        self._disk = None
+        if self.disk_path:
+            directory = os.path.dirname(self.disk_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._disk = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._disk.commit()
+
+    def complete(
+        self,
+        messages,
+        model=None,
+        temperature=None,
+        cache=None,
+        priority=INTERACTIVE,
+        on_token=None,
+        stage=None,
+        **params,
+    ):
+        """
+        Returns the completion text for messages (a prompt string or a list of
+        {"role", "content"} dicts). cache defaults to temperature == 0; extra
+        params are passed to litellm and are part of the cache key. Background
+        work (ingestion) passes priority=BACKGROUND so interactive requests
+        are admitted first. With on_token the completion is streamed and
+        on_token(text) is called for every chunk (once, with the whole text,
+        on a cache hit). Metrics are labelled with stage, by default the
+        enclosing metrics stage or the name of the calling function.
+        """
+        stage = stage or metrics.current_stage() or caller_stage()
+        with metrics.timed("llm", stage):
+            return self._complete(
+                messages, model, temperature, cache, priority, on_token, stage, params
+            )
+
+    def _complete(
+        self, messages, model, temperature, cache, priority, on_token, stage, params
+    ):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        model = model or self.model
+        if temperature is not None:
+            params["temperature"] = temperature
+        if cache is None:
+            cache = temperature == 0
+        cache = cache and self.cache_enabled
+
+        if not cache:
+            with self._lock:
+                self._counters["uncached"] += 1
+            return self._call(model, messages, params, priority, on_token, stage)
+
+        key = self.cache_key(model, messages, params)
+        content = self._get_cached(key)
+        metrics.inc(
+            "llm_cache_requests_total",
+            {"stage": stage, "result": "miss" if content is None else "hit"},
+        )
+        if content is not None:
+            if on_token:
+                on_token(content)
+            return content
+
+        content = self._call(model, messages, params, priority, on_token, stage)
+        self._put_cached(key, content)
+        return content
+
+    @staticmethod
+    def cache_key(model, messages, params=None):
+        normalized = [
+            {
+                "role": message.get("role", "user"),
+                "content": WHITESPACE.sub(" ", str(message.get("content", ""))).strip(),
+            }
+            for message in messages
+        ]
+        payload = json.dumps(
+            {"model": model, "messages": normalized, "params": params or {}},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _call(
+        self, model, messages, params, priority=INTERACTIVE, on_token=None, stage=None
+    ):
+        # ~4 characters per token for the prompt plus a fixed completion budget
+        prompt_tokens = (
+            sum(len(str(message.get("content", ""))) for message in messages) // 4
+        )
+        estimated_tokens = prompt_tokens + self.completion_tokens_estimate
+        stage = stage or "unknown"
+        if on_token:
+            # a failure after the first chunk is not retried, the retry would
+            # send the start of the completion again
+            streamed = []
+
+            def send(text):
+                streamed.append(True)
+                on_token(text)
+
+            return self.scheduler.run(
+                lambda: self._stream(
+                    model, messages, params, send, stage, prompt_tokens
+                ),
+                priority=priority,
+                tokens=estimated_tokens,
+                can_retry=lambda: not streamed,
+            )
+
+        response = self.scheduler.run(
+            lambda: self._completion(model, messages, params, stage),
+            priority=priority,
+            tokens=estimated_tokens,
+            count_tokens=lambda response: response.usage.total_tokens,
+        )
+        return response.choices[0].message.content
+
+    def _completion(self, model, messages, params, stage):
+        start = time.perf_counter()
+        response = self.completion(
+            model=model,
+            messages=messages,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            **params,
+        )
+        usage = getattr(response, "usage", None)
+        metrics.record_llm(
+            stage,
+            model,
+            time.perf_counter() - start,
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+        return response
+
+    def _stream(self, model, messages, params, on_token, stage, prompt_tokens):
+        # streamed chunks carry no usage, so tokens are estimated from the text
+        start = time.perf_counter()
+        parts = []
+        for chunk in self.completion(
+            model=model,
+            messages=messages,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            stream=True,
+            **params,
+        ):
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                parts.append(text)
+                on_token(text)
+        content = "".join(parts)
+        metrics.record_llm(
+            stage, model, time.perf_counter() - start, prompt_tokens, len(content) // 4
+        )
+        return content
+
+    def _get_cached(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.cache_ttl:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[0]
+            if entry:
+                del self._memory[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT content, created_at FROM llm_responses WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+                if row and now - row[1] < self.cache_ttl:
+                    self._remember(key, row[0], row[1])
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def _put_cached(self, key, content):
+        if content is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_responses (cache_key, content, created_at) VALUES (?, ?, ?)",
+                    (key, content, now),
+                )
+                self._disk.execute(
+                    "DELETE FROM llm_responses WHERE created_at < ?",
+                    (now - self.cache_ttl,),
+                )
+                self._disk.commit()
+
+    def _remember(self, key, content, created_at):
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._memory)
+        stats["max_entries"] = self.cache_size
+        stats["ttl_seconds"] = self.cache_ttl
+        stats["disk_path"] = self.disk_path
+        stats["scheduler"] = self.scheduler.stats()
+        if os.getenv("LLM_BACKEND", "live") != "live":
+            stats["replay"] = get_recordings().stats()
+        return stats
+
+
+llm_gateway = LLMGateway()
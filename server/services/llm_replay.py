@@ -0,0 +1,338 @@
+"""
+Offline stand-in for the LLM providers, used to benchmark the pipelines
+reproducibly without Gemini.
+
+LLM_BACKEND selects the backend of both the LLM gateway (litellm) and the SQL
+agent's chat model (ChatGoogleGenerativeAI):
+
+    live    call the provider (default)
+    record  call the provider and append every response to LLM_RECORDINGS_PATH
+    replay  answer from LLM_RECORDINGS_PATH only, keyed by the prompt hash
+
+Replayed calls sleep for a synthetic latency drawn from LLM_REPLAY_LATENCY:
+
+    recorded              the latency measured when the response was recorded
+    none                  no delay
+    fixed:0.8             always 0.8s
+    uniform:0.3:1.5       uniform between 0.3s and 1.5s
+    normal:0.8:0.2        normal with mean 0.8s and standard deviation 0.2s
+    lognormal:0.8:0.5     lognormal with median 0.8s and sigma 0.5
+
+Draws are seeded by LLM_REPLAY_SEED, the prompt hash and how often that
+prompt was replayed, so a run gets the same delays whatever the thread
+interleaving. A prompt without a recording raises ReplayMiss, unless
+LLM_REPLAY_MISS holds a text to answer with instead.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "cache")
+WHITESPACE = re.compile(r"\s+")
+# request options that do not change the response
+IGNORED_PARAMS = ("api_key", "stream", "stream_options", "timeout")
+
+
+class ReplayMiss(Exception):
+    pass
+
+
+def prompt_key(messages, params=None):
+    """sha256 of the whitespace-normalised messages and response-shaping params"""
+    normalized = [
+        {
+            key: (
+                WHITESPACE.sub(" ", value).strip() if isinstance(value, str) else value
+            )
+            for key, value in message.items()
+        }
+        for message in messages
+    ]
+    params = {
+        key: value for key, value in (params or {}).items() if key not in IGNORED_PARAMS
+    }
+    payload = json.dumps(
+        {"messages": normalized, "params": params}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SyntheticLatency:
+    """Delay model parsed from an LLM_REPLAY_LATENCY spec"""
+
+    def __init__(self, spec="recorded", seed=0):
+        self.spec = spec or "recorded"
+        self.seed = seed
+        kind, *values = self.spec.split(":")
+        self.kind = kind
+        self.values = [float(value) for value in values]
+        if kind not in ("recorded", "none", "fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.spec}")
+
+    def sample(self, key, occurrence, recorded=0.0):
+        rng = random.Random(f"{self.seed}:{key}:{occurrence}")
+        if self.kind == "recorded":
+            return recorded or 0.0
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.values[0], self.values[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.values[0], self.values[1]))
+        return rng.lognormvariate(math.log(self.values[0]), self.values[1])
+
+
+class LLMRecordings:
+    """
+    Recorded responses in a JSON-lines file, one {"key", "kind", "response",
+    "latency"} object per line (the last line of a key wins).
+    """
+
+    def __init__(self, path=None, mode=None, latency=None, seed=None, on_miss=None):
+        self.path = path or os.getenv(
+            "LLM_RECORDINGS_PATH", os.path.join(CACHE_DIR, "llm_recordings.jsonl")
+        )
+        self.mode = mode or os.getenv("LLM_BACKEND", "live")
+        seed = seed if seed is not None else int(os.getenv("LLM_REPLAY_SEED", 0))
+        self.latency = SyntheticLatency(
+            latency or os.getenv("LLM_REPLAY_LATENCY", "recorded"), seed
+        )
+        self.on_miss = on_miss or os.getenv("LLM_REPLAY_MISS", "error")
+
+        self._entries = {}
+        self._occurrences = {}
+        self._lock = threading.Lock()
+        self._counters = {"replayed": 0, "missed": 0, "recorded": 0}
+        if os.path.exists(self.path):
+            with open(self.path) as recordings:
+                for line in recordings:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    def record(self, key, kind, response, latency):
+        entry = {
+            "key": key,
+            "kind": kind,
+            "response": response,
+            "latency": round(latency, 4),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.path, "a") as recordings:
+                recordings.write(json.dumps(entry, default=str) + "\n")
+            self._counters["recorded"] += 1
+
+    def replay(self, key):
+        """Returns (response, delay) for a recorded prompt"""
+        with self._lock:
+            entry = self._entries.get(key)
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+            self._counters["missed" if entry is None else "replayed"] += 1
+
+        if entry is None:
+            if self.on_miss == "error":
+                raise ReplayMiss(f"No recorded LLM response for prompt {key[:12]}")
+            return None, self.latency.sample(key, occurrence)
+        return entry["response"], self.latency.sample(
+            key, occurrence, entry.get("latency", 0.0)
+        )
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update(
+            {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "latency": self.latency.spec,
+            }
+        )
+        return stats
+
+
+class ReplayCompletion:
+    """litellm.completion() replacement for the record and replay modes"""
+
+    def __init__(self, recordings):
+        self.recordings = recordings
+
+    def __call__(self, model, messages, stream=False, **params):
+        key = prompt_key(messages, params)
+        if self.recordings.recording:
+            return self._record(key, model, messages, stream, params)
+
+        content, delay = self.recordings.replay(key)
+        if content is None:
+            content = self.recordings.on_miss
+        if stream:
+            return self._stream(content, delay)
+        time.sleep(delay)
+        return self._response(content, messages)
+
+    def _record(self, key, model, messages, stream, params):
+        import litellm
+
+        start = time.perf_counter()
+        response = litellm.completion(
+            model=model, messages=messages, stream=stream, **params
+        )
+        if not stream:
+            self.recordings.record(
+                key,
+                "completion",
+                response.choices[0].message.content,
+                time.perf_counter() - start,
+            )
+            return response
+
+        def chunks():
+            parts = []
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+            self.recordings.record(
+                key, "completion", "".join(parts), time.perf_counter() - start
+            )
+
+        return chunks()
+
+    @staticmethod
+    def _response(content, messages):
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    @staticmethod
+    def _stream(content, delay, chunk_size=24):
+        # the delay is spread evenly over the chunks like a token stream
+        pieces = [
+            content[i : i + chunk_size] for i in range(0, len(content), chunk_size)
+        ] or [""]
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]
+            )
+
+
+def _message_payload(message):
+    # run ids differ between runs, so only what the model sees is hashed
+    data = message_to_dict(message)["data"]
+    return {
+        "type": message.type,
+        "content": data.get("content"),
+        "tool_calls": [
+            {"name": call["name"], "args": call["args"], "id": call.get("id")}
+            for call in data.get("tool_calls") or []
+        ],
+        "tool_call_id": data.get("tool_call_id"),
+    }
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    LangChain chat model for the record and replay modes. Records through
+    (and binds tools onto) `live` when recording, replays the recorded
+    messages, tool calls included, otherwise.
+    """
+
+    recordings: LLMRecordings
+    live: object = None
+    model: str = "replay"
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self):
+        return "llm-replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tools = kwargs.get("tools")
+        key = prompt_key(
+            [_message_payload(message) for message in messages],
+            {"tools": tools, "stop": stop},
+        )
+
+        if self.recordings.recording:
+            live = self.live.bind_tools(tools) if tools else self.live
+            start = time.perf_counter()
+            message = live.invoke(messages, stop=stop)
+            self.recordings.record(
+                key, "chat", message_to_dict(message), time.perf_counter() - start
+            )
+        else:
+            response, delay = self.recordings.replay(key)
+            time.sleep(delay)
+            if response is None:
+                response = {"type": "ai", "data": {"content": self.recordings.on_miss}}
+            message = messages_from_dict([response])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+_recordings = None
+_recordings_lock = threading.Lock()
+
+
+def get_recordings():
+    global _recordings
+    with _recordings_lock:
+        if _recordings is None:
+            _recordings = LLMRecordings()
+        return _recordings
+
+
+def completion_backend():
+    """litellm.completion, or its record/replay stand-in per LLM_BACKEND"""
+    if os.getenv("LLM_BACKEND", "live") == "live":
+        import litellm
+
+        return litellm.completion
+    return ReplayCompletion(get_recordings())
+
+
+def chat_model_backend(create_live):
+    """create_live(), or a record/replay chat model per LLM_BACKEND"""
+    mode = os.getenv("LLM_BACKEND", "live")
+    if mode == "live":
+        return create_live()
+    return ReplayChatModel(
+        recordings=get_recordings(),
+        live=create_live() if mode == "record" else None,
+        model=mode,
+    )
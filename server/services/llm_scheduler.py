@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+# Priority classes, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ERROR_NAMES = (
+    "RateLimitError",
+    "ServiceUnavailableError",
+    "InternalServerError",
+    "APIConnectionError",
+    "Timeout",
+)
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; a rate of 0 means unlimited"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, amount):
+        if not self.capacity:
+            return 0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        if self.capacity:
+            self.available -= min(amount, self.capacity)
+
+    def give(self, amount):
+        # amount is negative when a call used more than it reserved
+        if self.capacity:
+            self.available = min(self.capacity, self.available + amount)
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM provider.
+
+    Calls wait in a priority queue (INTERACTIVE before BACKGROUND, FIFO within
+    a class) until a concurrency slot is free and the request-per-minute
+    (LLM_RPM) and token-per-minute (LLM_TPM) buckets can cover them. The
+    concurrency limit adapts AIMD-style: it grows by 1/limit after each
+    success and halves on a rate-limit error (at most once per second),
+    between 1 and LLM_MAX_CONCURRENCY. Rate-limit and transient provider
+    errors are retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        rpm=None,
+        tpm=None,
+        max_concurrency=None,
+        retries=None,
+        backoff=None,
+    ):
+        rpm = rpm if rpm is not None else int(os.getenv("LLM_RPM", 2000))
+        tpm = tpm if tpm is not None else int(os.getenv("LLM_TPM", 4000000))
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("LLM_MAX_CONCURRENCY", 32)
+        )
+        self.retries = (
+            retries if retries is not None else int(os.getenv("LLM_RETRIES", 4))
+        )
+        self.backoff = backoff or float(os.getenv("LLM_BACKOFF_SECONDS", 1))
+
+        self.limit = float(min(8, self.max_concurrency))
+        self.in_flight = 0
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._counters = {
+            "completed": 0,
+            "rate_limited": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    def run(
+        self, fn, priority=INTERACTIVE, tokens=0, count_tokens=None, can_retry=None
+    ):
+        """
+        Calls fn() once admitted and returns its result. tokens is the
+        estimated token cost reserved up front; count_tokens(result) may
+        return the actual cost so the token bucket is corrected. A retryable
+        failure is only retried if can_retry() is true; streaming callers
+        return False once output was sent, so it is never sent twice.
+        """
+        attempt = 0
+        while True:
+            self._acquire(priority, tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                retryable = self._is_retryable(e) and (not can_retry or can_retry())
+                self._release(tokens, error=e)
+                if not retryable or attempt >= self.retries:
+                    with self._cond:
+                        self._counters["failed"] += 1
+                    raise
+                delay = self.backoff * (2**attempt) * (0.5 + random.random())
+                print(f"LLM call failed ({e}), retrying in {delay:.2f}s")
+                with self._cond:
+                    self._counters["retried"] += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            actual = None
+            if count_tokens:
+                try:
+                    actual = count_tokens(result)
+                except Exception:
+                    actual = None
+            self._release(tokens, actual=actual)
+            return result
+
+    def _acquire(self, priority, tokens):
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket and self.in_flight < max(
+                        1, int(self.limit)
+                    ):
+                        timeout = max(
+                            self._requests.wait_time(1), self._tokens.wait_time(tokens)
+                        )
+                        if not timeout:
+                            heapq.heappop(self._waiting)
+                            self._requests.take(1)
+                            self._tokens.take(tokens)
+                            self.in_flight += 1
+                            self._cond.notify_all()
+                            return
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self, tokens, actual=None, error=None):
+        with self._cond:
+            self.in_flight -= 1
+            if actual is not None:
+                self._tokens.give(tokens - actual)
+
+            if error is None:
+                self._counters["completed"] += 1
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif self._is_rate_limited(error):
+                self._counters["rate_limited"] += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= 1:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+            self._cond.notify_all()
+
+    @staticmethod
+    def _status_code(error):
+        status = getattr(error, "status_code", None)
+        try:
+            return int(status)
+        except (TypeError, ValueError):
+            return None
+
+    def _is_rate_limited(self, error):
+        if self._status_code(error) == 429:
+            return True
+        message = str(error)
+        return (
+            type(error).__name__ == "RateLimitError"
+            or "429" in message
+            or "RESOURCE_EXHAUSTED" in message
+        )
+
+    def _is_retryable(self, error):
+        if self._is_rate_limited(error):
+            return True
+        if self._status_code(error) in RETRY_STATUSES:
+            return True
+        return type(error).__name__ in RETRY_ERROR_NAMES
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(
+                {
+                    "concurrency_limit": round(self.limit, 2),
+                    "in_flight": self.in_flight,
+                    "waiting": len(self._waiting),
+                    "requests_available": (
+                        round(self._requests.available, 1)
+                        if self._requests.capacity
+                        else None
+                    ),
+                    "tokens_available": (
+                        round(self._tokens.available) if self._tokens.capacity else None
+                    ),
+                }
+            )
+        return stats
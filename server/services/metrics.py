@@ -0,0 +1,263 @@
+"""
+In-process pipeline metrics rendered in the Prometheus text format.
+
+Every LLM, DB and People Data Labs call is timed under a stage label. The
+stage is whatever the innermost `metrics.stage(name)` / `metrics.timed(kind,
+name)` block of the current thread set, falling back to the name of the
+calling function. Values are per worker process.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+DESCRIPTIONS = {
+    "stage_duration_seconds": (
+        "histogram",
+        "Wall time of a pipeline stage, including LLM cache hits and rate limit waits",
+    ),
+    "stage_errors_total": ("counter", "Pipeline stages that raised"),
+    "llm_request_duration_seconds": (
+        "histogram",
+        "Latency of LLM provider calls (cache misses only)",
+    ),
+    "llm_tokens_total": ("counter", "LLM tokens by stage, model and type"),
+    "llm_cost_usd_total": ("counter", "Estimated LLM cost in US dollars"),
+    "llm_cache_requests_total": ("counter", "LLM gateway cache lookups by result"),
+}
+
+
+def _label_string(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def caller_stage(depth=2):
+    """Name of the function depth frames up, as a stage label"""
+    try:
+        return sys._getframe(depth).f_code.co_name.strip("_") or "unknown"
+    except ValueError:
+        return "unknown"
+
+
+class Metrics:
+    """
+    Counters and latency histograms keyed by (name, labels). Token costs use
+    LLM_INPUT_COST_PER_MTOK / LLM_OUTPUT_COST_PER_MTOK (US dollars per
+    million tokens, gemini-2.0-flash list prices by default).
+    """
+
+    def __init__(self, input_cost=None, output_cost=None):
+        self.input_cost = (
+            input_cost
+            if input_cost is not None
+            else float(os.getenv("LLM_INPUT_COST_PER_MTOK", 0.10))
+        )
+        self.output_cost = (
+            output_cost
+            if output_cost is not None
+            else float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", 0.40))
+        )
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [
+                    [0] * len(LATENCY_BUCKETS),
+                    0.0,
+                    0,
+                ]
+            buckets = histogram[0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def current_stage(self):
+        return getattr(self._local, "stage", None)
+
+    @contextmanager
+    def stage(self, name):
+        """Labels the calls made inside the block with stage name"""
+        previous = self.current_stage()
+        self._local.stage = name
+        try:
+            yield
+        finally:
+            self._local.stage = previous
+
+    @contextmanager
+    def timed(self, kind, stage=None):
+        """Times the block as one kind ("llm", "db", "pdl") call of stage"""
+        stage = stage or self.current_stage() or caller_stage(3)
+        labels = {"kind": kind, "stage": stage}
+        start = time.perf_counter()
+        try:
+            with self.stage(stage):
+                yield
+        except Exception:
+            self.inc("stage_errors_total", labels)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", labels, time.perf_counter() - start)
+
+    def record_llm(self, stage, model, seconds, prompt_tokens, completion_tokens):
+        """One provider call: latency, token counts and estimated cost"""
+        labels = {"stage": stage, "model": model}
+        self.observe("llm_request_duration_seconds", labels, seconds)
+        self.inc("llm_tokens_total", dict(labels, type="prompt"), prompt_tokens)
+        self.inc("llm_tokens_total", dict(labels, type="completion"), completion_tokens)
+        cost = (
+            prompt_tokens * self.input_cost + completion_tokens * self.output_cost
+        ) / 1e6
+        self.inc("llm_cost_usd_total", labels, cost)
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(value[0]), value[1], value[2])
+                for key, value in self._histograms.items()
+            }
+
+        lines = []
+        for name, (metric_type, description) in DESCRIPTIONS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "counter":
+                for (key_name, labels), value in sorted(counters.items()):
+                    if key_name == name:
+                        lines.append(f"{name}{_label_string(labels)} {value:g}")
+                continue
+
+            for (key_name, labels), (buckets, total, count) in sorted(
+                histograms.items()
+            ):
+                if key_name != name:
+                    continue
+                for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                    bucket_labels = labels + (("le", f"{bound:g}"),)
+                    lines.append(
+                        f"{name}_bucket{_label_string(bucket_labels)} {bucket_count}"
+                    )
+                lines.append(
+                    f"{name}_bucket{_label_string(labels + (('le', '+Inf'),))} {count}"
+                )
+                lines.append(f"{name}_sum{_label_string(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_label_string(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that records every execute() as a "db" stage"""
+
+    def execute(self, query, vars=None):
+        with metrics.timed("db", metrics.current_stage() or caller_stage()):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with metrics.timed("db", metrics.current_stage() or caller_stage()):
+            return super().executemany(query, vars_list)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records the chat model calls and SQL queries a LangChain agent makes
+    outside the LLM gateway, under the stage given at construction.
+    """
+
+    def __init__(self, stage, model=None):
+        self.stage = stage
+        self.model = model or "langchain"
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, run_id=None, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, run_id=None, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations or []:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        metrics.record_llm(
+            self.stage,
+            self.model,
+            time.perf_counter() - started,
+            prompt_tokens,
+            completion_tokens,
+        )
+
+    def on_llm_error(self, error, run_id=None, **kwargs):
+        if self._started.pop(run_id, None) is not None:
+            metrics.inc("stage_errors_total", {"kind": "llm", "stage": self.stage})
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        if (serialized or {}).get("name") == "sql_db_query":
+            self._started[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            metrics.observe(
+                "stage_duration_seconds",
+                {"kind": "db", "stage": f"{self.stage}_query"},
+                time.perf_counter() - started,
+            )
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        if self._started.pop(run_id, None) is not None:
+            metrics.inc(
+                "stage_errors_total", {"kind": "db", "stage": f"{self.stage}_query"}
+            )
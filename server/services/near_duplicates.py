@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# Universal hashing (a * x + b) mod p with 32-bit inputs and a, b < p keeps
+# every product inside uint64
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class NearDuplicateIndex:
+    """
+    MinHash / LSH index over resume texts for one ingestion run.
+
+    Each text is reduced to its set of word shingles and a MinHash signature
+    of num_perm values; the signature is split into `bands` bands that are
+    bucketed so only texts sharing at least one band are compared. A text is
+    a near-duplicate when the estimated Jaccard similarity of its signature
+    with an indexed one reaches `threshold` (NEAR_DUPLICATE_THRESHOLD, 0
+    disables detection). Texts with fewer words than one shingle are never
+    indexed, so empty extractions are not folded together.
+
+    A text that is not a near-duplicate is reserved under its key by find(),
+    so texts arriving while its candidate is still in flight match it too;
+    the caller confirm()s the key once the candidate is stored or release()s
+    it when the candidate fails.
+    """
+
+    def __init__(self, threshold=None, num_perm=128, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.9))
+        )
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+        self._signatures = {}
+        self._pending = set()
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def signature(self, text):
+        words = WORD_PATTERN.findall((text or "").lower())
+        if len(words) < self.shingle_size:
+            return None
+
+        shingles = {
+            " ".join(words[i : i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        hashes &= np.uint64(MERSENNE_PRIME)
+
+        permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(MERSENNE_PRIME)
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [
+            signature[i * self.rows : (i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def find(self, key, text):
+        """
+        Returns (first_key, similarity) when text is a near-duplicate of a
+        text indexed or reserved before it, else None, in which case text is
+        reserved under key. Texts too short to be indexed return None and
+        are not reserved.
+        """
+        if not self.enabled:
+            return None
+
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            best_key, best_similarity = None, 0.0
+            seen = set()
+            for band, band_key in enumerate(band_keys):
+                for other_key in self._buckets[band].get(band_key, ()):
+                    if other_key in seen:
+                        continue
+                    seen.add(other_key)
+                    similarity = float(
+                        np.mean(self._signatures[other_key] == signature)
+                    )
+                    if similarity > best_similarity:
+                        best_key, best_similarity = other_key, similarity
+
+            if best_key is not None and best_similarity >= self.threshold:
+                return best_key, round(best_similarity, 4)
+
+            if key not in self._signatures:
+                self._signatures[key] = signature
+                self._pending.add(key)
+                for band, band_key in enumerate(band_keys):
+                    self._buckets[band].setdefault(band_key, []).append(key)
+        return None
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._signatures
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def confirm(self, key):
+        """Marks a reserved text as stored"""
+        with self._lock:
+            self._pending.discard(key)
+
+    def release(self, key):
+        """Drops a reserved text whose candidate was not stored"""
+        with self._lock:
+            if key not in self._pending:
+                return
+            self._pending.discard(key)
+            signature = self._signatures.pop(key)
+            for band, band_key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band][band_key]
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
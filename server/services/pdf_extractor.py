@@ -0,0 +1,95 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF is optional, PyPDF2 is always available
+    pymupdf = None
+
+from PyPDF2 import PdfReader
+
+# PyMuPDF holds the GIL and does not support use from several threads, so
+# every call made in this process goes through one lock
+_pymupdf_lock = threading.Lock()
+
+
+def _pymupdf_page_range(pdf_bytes, start, stop):
+    # Runs in a pool worker process, which opens its own Document
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return "".join([doc[i].get_text() for i in range(start, stop)])
+
+
+class PdfExtractor:
+    """
+    Extracts text from in-memory PDF bytes.
+
+    The backend defaults to PyMuPDF ("pymupdf") and falls back to PyPDF2
+    ("pypdf2") when PyMuPDF is not installed; PDF_EXTRACT_BACKEND overrides it.
+    PyMuPDF is not thread-safe, so documents parsed in this process are
+    parsed one at a time behind a lock. Documents with at least
+    parallel_min_pages pages are split into page ranges that are parsed on a
+    process pool of max_workers processes (PDF_PARSE_WORKERS) owned by the
+    extractor. Its workers are spawned, never forked from the threaded
+    server.
+    """
+
+    BACKENDS = ("pymupdf", "pypdf2")
+
+    def __init__(self, backend=None, parallel_min_pages=None, max_workers=None):
+        backend = backend or os.getenv(
+            "PDF_EXTRACT_BACKEND", "pymupdf" if pymupdf else "pypdf2"
+        )
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {backend}")
+        if backend == "pymupdf" and not pymupdf:
+            raise ValueError("PyMuPDF is not installed")
+
+        self.backend = backend
+        self.parallel_min_pages = parallel_min_pages or int(
+            os.getenv("PDF_PARALLEL_MIN_PAGES", 64)
+        )
+        self.max_workers = max_workers or int(
+            os.getenv("PDF_PARSE_WORKERS", os.cpu_count() or 2)
+        )
+        self._page_pool = None
+        self._page_pool_lock = threading.Lock()
+
+    def extract_text(self, pdf_bytes):
+        if self.backend == "pymupdf":
+            return self._extract_pymupdf(pdf_bytes)
+        return self._extract_pypdf2(pdf_bytes)
+
+    def _extract_pypdf2(self, pdf_bytes):
+        pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
+        return "".join([page.extract_text() or "" for page in pdf_reader.pages])
+
+    def _extract_pymupdf(self, pdf_bytes):
+        with _pymupdf_lock:
+            with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = doc.page_count
+                if page_count < self.parallel_min_pages or self.max_workers < 2:
+                    return "".join([page.get_text() for page in doc])
+
+        step = -(-page_count // self.max_workers)
+        ranges = [
+            (start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ]
+        pool = self._get_page_pool()
+        futures = [
+            pool.submit(_pymupdf_page_range, pdf_bytes, start, stop)
+            for start, stop in ranges
+        ]
+        return "".join([future.result() for future in futures])
+
+    def _get_page_pool(self):
+        with self._page_pool_lock:
+            if self._page_pool is None:
+                self._page_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._page_pool
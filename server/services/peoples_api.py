@@ -1,6 +1,7 @@
 import os
 from peopledatalabs import PDLPY
 import traceback
+from services.metrics import metrics
 
 class PeoplesApi:
     def __init__(self):
@@ -19,11 +20,12 @@ class PeoplesApi:
             # Other parameters like `size` are passed as keyword arguments.
             size = elastic_query.pop('size', 10) # Default to 10 if not in query
 
-            response = self.client.person.search(
-                query=elastic_query,
-                size=size,
-                pretty=True
-            ).json()
+            with metrics.timed("pdl", "person_search"):
+                response = self.client.person.search(
+                    query=elastic_query,
+                    size=size,
+                    pretty=True
+                ).json()
             
             if response.get('status') == 200:
                 data = response.get('data', [])
@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+import numpy as np
+from scipy.sparse import csr_matrix
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+STOP_WORDS = frozenset(
+    """
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing for from further had has have having he her here
+    him his how i if in into is it its itself just may me might more most must my
+    no nor not of on once only or other our ours out over own per same shall she
+    should so some such than that the their them then there these they this those
+    through to too under until up very was we well were what when where which while
+    who whom why will with within would you your yours etc e.g i.e role team work
+    working job candidate candidates looking years year experience required
+    requirements responsibilities preferred plus strong good ability skills
+    """.split()
+)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        token = token.rstrip(".")
+        if len(token) > 1 and token not in STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+class RelevanceScorer:
+    """
+    Cheap lexical relevance of resumes against one job description.
+
+    The JD terms form the query; each resume is scored with BM25: term
+    saturation (k1, b), inverse document frequency and the average resume
+    length, with each term weighted by 1 + log(tf) of the term in the JD.
+    IDF and the average length come from a reference corpus: the stored
+    resumes passed as `corpus`, topped up with the resumes scored in the run
+    until it holds min_documents (PRESCORE_MIN_DOCUMENTS). The statistics are
+    then frozen, so a resume's score does not depend on where it sits in the
+    CSV. Scores are scaled to 0-100 of the BM25 upper bound for the query, so
+    they rank resumes against each other but are not comparable to the LLM's
+    match score. Batches are scored with one sparse matrix product.
+
+    Resumes scoring below `threshold` can skip the LLM scoring stage, but
+    only once the statistics are frozen; a threshold of 0 disables the
+    cut-off.
+    """
+
+    def __init__(
+        self, jd_text, corpus=(), threshold=None, min_documents=None, k1=1.2, b=0.75
+    ):
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(os.getenv("PRESCORE_THRESHOLD", 0))
+        )
+        self.min_documents = min_documents or int(
+            os.getenv("PRESCORE_MIN_DOCUMENTS", 50)
+        )
+        self.k1 = k1
+        self.b = b
+
+        jd_counts = {}
+        for token in tokenize(jd_text):
+            jd_counts[token] = jd_counts.get(token, 0) + 1
+
+        self.vocabulary = {token: i for i, token in enumerate(jd_counts)}
+        self.weights = 1.0 + np.log(np.array(list(jd_counts.values()), dtype=float))
+
+        # corpus statistics, shared by the pipeline workers scoring batches
+        self._documents = 0
+        self._total_length = 0
+        self._document_frequency = np.zeros(len(self.vocabulary))
+        self._lock = threading.Lock()
+
+        corpus = list(corpus)
+        if corpus and self.vocabulary:
+            self._add_to_corpus(*self._term_frequencies(corpus))
+
+    @property
+    def frozen(self):
+        return self._documents >= self.min_documents
+
+    def score(self, resume_text):
+        return self.score_many([resume_text])[0]
+
+    def score_many(self, resume_texts):
+        return [score for score, _ in self.prescore(resume_texts)]
+
+    def prescore(self, resume_texts):
+        """
+        (score, relevant) for every resume; relevant is False only for
+        scores below the threshold computed on frozen statistics
+        """
+        if not resume_texts:
+            return []
+        if not self.vocabulary:
+            return [(0.0, True)] * len(resume_texts)
+
+        tf, lengths = self._term_frequencies(resume_texts)
+        with self._lock:
+            if not self.frozen:
+                self._add_to_corpus(tf, lengths)
+            frozen = self.frozen
+            documents = self._documents
+            avgdl = self._total_length / documents or 1.0
+            document_frequency = self._document_frequency.copy()
+
+        idf = np.log(
+            1 + (documents - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        term_weights = self.weights * idf
+
+        norm = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+        row_of_entry = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+        tf.data = tf.data * (self.k1 + 1) / (tf.data + norm[row_of_entry])
+
+        max_score = (self.k1 + 1) * term_weights.sum()
+        scores = tf @ term_weights / max_score * 100
+        return [
+            (
+                round(float(score), 2),
+                not frozen or bool(score >= self.threshold),
+            )
+            for score in scores
+        ]
+
+    def _term_frequencies(self, resume_texts):
+        rows, cols = [], []
+        lengths = np.zeros(len(resume_texts))
+        for i, text in enumerate(resume_texts):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                col = self.vocabulary.get(token)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+
+        tf = csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(resume_texts), len(self.vocabulary)),
+        )
+        tf.sum_duplicates()
+        return tf, lengths
+
+    def _add_to_corpus(self, tf, lengths):
+        self._documents += tf.shape[0]
+        self._total_length += lengths.sum()
+        self._document_frequency += np.bincount(
+            tf.indices, minlength=len(self.vocabulary)
+        )
@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "cache")
+
+
+class ResumeCache:
+    """
+    Persistent cache of extracted resume text.
+
+    Text is stored once per content hash (sha256 of the PDF bytes) and every
+    resume URL points at the hash it last resolved to, together with the
+    ETag / Last-Modified validators of that response. URL entries younger than
+    url_ttl are served without touching the network; older ones are
+    revalidated with a conditional request. Total stored text is bounded by
+    max_bytes, evicting the least recently used hashes first.
+    """
+
+    def __init__(self, path=None, max_bytes=None, url_ttl=None):
+        self.path = path or os.getenv(
+            "RESUME_CACHE_PATH", os.path.join(CACHE_DIR, "resume_cache.sqlite3")
+        )
+        self.max_bytes = max_bytes or int(
+            os.getenv("RESUME_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        )
+        self.url_ttl = (
+            url_ttl
+            if url_ttl is not None
+            else int(os.getenv("RESUME_CACHE_URL_TTL", 7 * 24 * 60 * 60))
+        )
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resume_texts (
+                content_hash TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS resume_urls (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS resume_texts_last_access
+                ON resume_texts (last_access);
+            """
+        )
+        self._conn.commit()
+
+        self._counters = {
+            "url_hits": 0,
+            "url_misses": 0,
+            "revalidated": 0,
+            "content_hits": 0,
+            "content_misses": 0,
+            "evictions": 0,
+        }
+
+    def lookup_url(self, url):
+        """
+        Returns {"content_hash", "etag", "last_modified", "text", "fresh"} for a
+        previously fetched URL, or None if the URL (or its text) is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT u.content_hash, u.etag, u.last_modified, u.fetched_at, t.text
+                FROM resume_urls u JOIN resume_texts t
+                ON t.content_hash = u.content_hash
+                WHERE u.url = ?
+                """,
+                (url,),
+            ).fetchone()
+
+            if not row:
+                self._counters["url_misses"] += 1
+                return None
+
+            content_hash, etag, last_modified, fetched_at, text = row
+            fresh = time.time() - fetched_at < self.url_ttl
+            if fresh:
+                self._counters["url_hits"] += 1
+                self._touch(content_hash)
+                self._conn.commit()
+            return {
+                "content_hash": content_hash,
+                "etag": etag,
+                "last_modified": last_modified,
+                "text": text,
+                "fresh": fresh,
+            }
+
+    def revalidated(self, url):
+        """Marks a stale URL entry as fresh again after a 304 Not Modified"""
+        with self._lock:
+            self._counters["revalidated"] += 1
+            self._conn.execute(
+                "UPDATE resume_urls SET fetched_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            row = self._conn.execute(
+                "SELECT content_hash FROM resume_urls WHERE url = ?", (url,)
+            ).fetchone()
+            if row:
+                self._touch(row[0])
+            self._conn.commit()
+
+    def get_text(self, content_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM resume_texts WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+            if not row:
+                self._counters["content_misses"] += 1
+                return None
+            self._counters["content_hits"] += 1
+            self._touch(content_hash)
+            self._conn.commit()
+            return row[0]
+
+    def put(self, url, content_hash, text, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO resume_texts (content_hash, text, size, last_access)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET last_access = excluded.last_access
+                """,
+                (content_hash, text, len(text.encode("utf-8")), now),
+            )
+            if url:
+                self._conn.execute(
+                    """
+                    INSERT INTO resume_urls (url, content_hash, etag, last_modified, fetched_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        content_hash = excluded.content_hash,
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified,
+                        fetched_at = excluded.fetched_at
+                    """,
+                    (url, content_hash, etag, last_modified, now),
+                )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM resume_texts"
+            ).fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM resume_urls").fetchone()[0]
+            return {
+                **self._counters,
+                "entries": entries,
+                "urls": urls,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _touch(self, content_hash):
+        self._conn.execute(
+            "UPDATE resume_texts SET last_access = ? WHERE content_hash = ?",
+            (time.time(), content_hash),
+        )
+
+    def _evict(self):
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM resume_texts"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT content_hash, size FROM resume_texts ORDER BY last_access ASC"
+        )
+        evicted = []
+        for content_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append(content_hash)
+            total -= size
+
+        for content_hash in evicted:
+            self._conn.execute(
+                "DELETE FROM resume_texts WHERE content_hash = ?", (content_hash,)
+            )
+            self._conn.execute(
+                "DELETE FROM resume_urls WHERE content_hash = ?", (content_hash,)
+            )
+        self._counters["evictions"] += len(evicted)
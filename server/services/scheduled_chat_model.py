@@ -0,0 +1,77 @@
+from langchain_core.language_models.chat_models import (
+    BaseChatModel,
+    generate_from_stream,
+)
+
+from services.llm_scheduler import INTERACTIVE
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    LangChain chat model that admits every generation of `inner` through an
+    LLMScheduler, so the SQL agent's calls share the token buckets, priority
+    queue and AIMD concurrency limit of the LLM gateway.
+
+    With streaming, inner's chunks are read inside the scheduler slot and
+    passed to the callbacks' on_llm_new_token as they arrive; a model that
+    cannot stream (the replay backend) sends its text as a single token.
+    """
+
+    inner: object
+    scheduler: object
+    priority: int = INTERACTIVE
+    streaming: bool = False
+    completion_tokens_estimate: int = 1024
+    model: str = "langchain"
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self):
+        return f"scheduled-{self.inner._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        # inner formats the tools for its provider, the binding's kwargs are
+        # then passed back to inner._generate
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def _estimate_tokens(self, messages):
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        return prompt_chars // 4 + self.completion_tokens_estimate
+
+    @staticmethod
+    def _count_tokens(result):
+        usage = getattr(result.generations[0].message, "usage_metadata", None)
+        return usage.get("total_tokens") if usage else None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        # chunks already passed to the callbacks cannot be taken back, so a
+        # call that fails after the first one is not retried
+        streamed = []
+
+        def call():
+            if not self.streaming or not run_manager:
+                return self.inner._generate(
+                    messages, stop=stop, run_manager=run_manager, **kwargs
+                )
+            if type(self.inner)._stream is BaseChatModel._stream:
+                result = self.inner._generate(messages, stop=stop, **kwargs)
+                message = result.generations[0].message
+                if message.content and not getattr(message, "tool_calls", None):
+                    run_manager.on_llm_new_token(message.content)
+                return result
+
+            chunks = []
+            for chunk in self.inner._stream(messages, stop=stop, **kwargs):
+                streamed.append(True)
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                chunks.append(chunk)
+            return generate_from_stream(iter(chunks))
+
+        return self.scheduler.run(
+            call,
+            priority=self.priority,
+            tokens=self._estimate_tokens(messages),
+            count_tokens=self._count_tokens,
+            can_retry=lambda: not streamed,
+        )
@@ -0,0 +1,95 @@
+import os
+import threading
+from collections import OrderedDict
+
+from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain_community.agent_toolkits.sql.base import create_sql_agent
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine
+
+
+class SQLAgentRegistry:
+    """
+    Ready-to-use SQL agents per job table over one shared SQLAlchemy engine.
+
+    get() returns the agent built for the table's current metadata version
+    (see TableMetadataCache), building the SQLDatabase, toolkit and agent
+    only on first use or after the table was rebuilt. At most max_agents
+    (SQL_AGENT_CACHE_SIZE) agents are kept, least recently used first out.
+    Agents hold no per-conversation state, so one instance serves
+    concurrent requests; callbacks are passed per invoke().
+    """
+
+    def __init__(self, connection_string, llm, table_metadata, max_agents=None):
+        self.llm = llm
+        self.table_metadata = table_metadata
+        self.max_agents = max_agents or int(os.getenv("SQL_AGENT_CACHE_SIZE", 64))
+        self.engine = create_engine(
+            connection_string,
+            pool_pre_ping=True,
+            pool_size=int(os.getenv("SQL_AGENT_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("SQL_AGENT_POOL_OVERFLOW", 10)),
+        )
+        self._agents = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self._counters = {"hits": 0, "builds": 0, "evictions": 0}
+
+    def get(self, table_name):
+        version = self.table_metadata.version(table_name)
+        key = (table_name, version)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                self._counters["hits"] += 1
+                return agent
+            # concurrent first requests for a table wait for a single build
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            try:
+                with self._lock:
+                    agent = self._agents.get(key)
+                if agent is None:
+                    agent = self._build(table_name)
+                    with self._lock:
+                        self._store(key, agent)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return agent
+
+    def _build(self, table_name):
+        print(f"Building SQL agent for {table_name}")
+        db = SQLDatabase(self.engine, include_tables=[table_name])
+        toolkit = SQLDatabaseToolkit(db=db, llm=self.llm)
+        return create_sql_agent(
+            llm=self.llm,
+            toolkit=toolkit,
+            verbose=True,
+            agent_type="openai-tools",
+            handle_parsing_errors=True,
+        )
+
+    def _store(self, key, agent):
+        # agents of older versions of the same table are dropped
+        for stale in [k for k in self._agents if k[0] == key[0] and k != key]:
+            del self._agents[stale]
+        self._agents[key] = agent
+        self._counters["builds"] += 1
+        while len(self._agents) > self.max_agents:
+            self._agents.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, table_name):
+        with self._lock:
+            for key in [k for k in self._agents if k[0] == table_name]:
+                del self._agents[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["agents"] = len(self._agents)
+        stats["max_agents"] = self.max_agents
+        return stats
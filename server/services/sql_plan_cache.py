@@ -0,0 +1,241 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+WRITE_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|merge|drop|alter|create|truncate|grant|revoke|copy"
+    r"|call|do|vacuum|analyze|set|reset|lock|comment|refresh|listen|notify|into)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_question(question):
+    """Lower-cased, whitespace-collapsed question without trailing punctuation"""
+    return re.sub(r"\s+", " ", question or "").strip().rstrip("?.! ").lower()
+
+
+def schema_fingerprint(metadata):
+    """
+    sha256 of a table's name and column names/types. Appending candidates
+    leaves it unchanged, so plans survive new rows but not a new schema.
+    """
+    if not metadata:
+        return None
+    columns = [(column["name"], column["type"]) for column in metadata["columns"]]
+    payload = json.dumps([metadata["table_name"], columns])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def read_only_sql(sql):
+    """sql as a single read-only statement, or None if it is anything else"""
+    sql = (sql or "").strip().rstrip(";").strip()
+    if not re.match(r"(select|with)\b", sql, re.IGNORECASE):
+        return None
+    # keywords inside literals ('%update%') or quoted names are not statements
+    code = QUOTED.sub("''", sql)
+    if ";" in code or WRITE_KEYWORDS.search(code):
+        return None
+    return sql
+
+
+class SQLPlanCache:
+    """
+    SQL the chat agent ran to answer a question, keyed by table, normalized
+    rephrased question and schema fingerprint, stored in private.sql_plans so
+    every worker shares it. lookup() serves from an in-process LRU of
+    max_entries (SQL_PLAN_CACHE_SIZE) plans before going to the database.
+
+    Only single read-only statements are stored, and run() executes a plan
+    on a read-only connection returning at most max_rows (SQL_PLAN_MAX_ROWS)
+    rows. A plan that fails to run is dropped with invalidate().
+    SQL_PLAN_CACHE_ENABLED=false turns lookups and stores off.
+    """
+
+    def __init__(self, connect, max_entries=None, max_rows=None):
+        self.connect = connect
+        self.max_entries = max_entries or int(os.getenv("SQL_PLAN_CACHE_SIZE", 1024))
+        self.max_rows = max_rows or int(os.getenv("SQL_PLAN_MAX_ROWS", 50))
+        self.enabled = os.getenv("SQL_PLAN_CACHE_ENABLED", "true").lower() == "true"
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._counters = {"hits": 0, "misses": 0, "stored": 0, "invalidated": 0}
+
+    @staticmethod
+    def plan_key(table_name, question, fingerprint):
+        payload = json.dumps([table_name, normalize_question(question), fingerprint])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _ensure_table(self, cursor):
+        if self._table_ready:
+            return
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.sql_plans (
+                plan_key TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                question TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+
+    def _execute(self, query, params, fetch=False):
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            self._ensure_table(cursor)
+            cursor.execute(query, params)
+            row = cursor.fetchone() if fetch else None
+            connection.commit()
+            self._table_ready = True
+            cursor.close()
+            return row
+        finally:
+            connection.close()
+
+    def lookup(self, table_name, question, fingerprint):
+        """Cached SQL for the question, or None"""
+        if not self.enabled or not fingerprint:
+            return None
+        key = self.plan_key(table_name, question, fingerprint)
+        with self._lock:
+            sql = self._plans.get(key)
+            if sql is not None:
+                self._plans.move_to_end(key)
+                self._counters["hits"] += 1
+                return sql
+
+        try:
+            row = self._execute(
+                "SELECT sql FROM private.sql_plans WHERE plan_key = %s",
+                (key,),
+                fetch=True,
+            )
+        except Exception as e:
+            print(f"Error reading SQL plan: {str(e)}")
+            row = None
+
+        with self._lock:
+            self._counters["hits" if row else "misses"] += 1
+        if not row:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def store(self, table_name, question, fingerprint, sql):
+        """Caches sql for the question if it is a single read-only statement"""
+        sql = read_only_sql(sql)
+        if not self.enabled or not sql or not fingerprint:
+            return False
+        key = self.plan_key(table_name, question, fingerprint)
+        try:
+            self._execute(
+                """
+                INSERT INTO private.sql_plans (plan_key, table_name, question, sql, updated_at)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (plan_key) DO UPDATE SET
+                    sql = excluded.sql,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (key, table_name, normalize_question(question), sql),
+            )
+        except Exception as e:
+            print(f"Error storing SQL plan: {str(e)}")
+            return False
+        self._remember(key, sql)
+        with self._lock:
+            self._counters["stored"] += 1
+        return True
+
+    def invalidate(self, table_name, question, fingerprint):
+        key = self.plan_key(table_name, question, fingerprint)
+        with self._lock:
+            self._plans.pop(key, None)
+            self._counters["invalidated"] += 1
+        try:
+            self._execute("DELETE FROM private.sql_plans WHERE plan_key = %s", (key,))
+        except Exception as e:
+            print(f"Error deleting SQL plan: {str(e)}")
+
+    def _remember(self, key, sql):
+        with self._lock:
+            self._plans[key] = sql
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def run(self, sql):
+        """Runs a cached plan read-only, returns (column_names, rows, total_rows)"""
+        sql = read_only_sql(sql)
+        if not sql:
+            raise Exception("SQL plan is not a read-only statement")
+        connection = self.connect()
+        try:
+            connection.set_session(readonly=True)
+            cursor = connection.cursor()
+            cursor.execute(sql)
+            column_names = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchmany(self.max_rows)
+            total_rows = cursor.rowcount
+            cursor.close()
+            connection.rollback()
+            return column_names, rows, total_rows
+        finally:
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["plans"] = len(self._plans)
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+class SQLCaptureCallbackHandler(BaseCallbackHandler):
+    """
+    Remembers the sql_db_query calls of an agent run that succeeded. sql is
+    the query only when exactly one succeeded, an answer built from several
+    queries cannot be replayed from one of them.
+    """
+
+    def __init__(self):
+        self.succeeded = []
+        self._queries = {}
+
+    @property
+    def sql(self):
+        return self.succeeded[0] if len(self.succeeded) == 1 else None
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        if name != "sql_db_query":
+            return
+        inputs = kwargs.get("inputs")
+        if isinstance(inputs, dict) and inputs.get("query"):
+            self._queries[run_id] = inputs["query"]
+            return
+        try:
+            # tool input printed as a dict, {'query': '...'}
+            parsed = ast.literal_eval(input_str)
+            query = parsed.get("query") if isinstance(parsed, dict) else input_str
+        except (ValueError, SyntaxError):
+            query = input_str
+        self._queries[run_id] = query
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        query = self._queries.pop(run_id, None)
+        # the query tool reports database errors as its output
+        if query and not str(getattr(output, "content", output)).startswith("Error"):
+            self.succeeded.append(query)
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        self._queries.pop(run_id, None)
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import psycopg2
+from dotenv import load_dotenv
+
+from services.metrics import TimedCursor
+
+load_dotenv()
+
+
+class TableMetadataCache:
+    """
+    Schema, sample rows and row count of each job table, shared by the chat
+    and insights services so prompts are assembled without querying
+    information_schema.
+
+    Metadata is built at ingestion (refresh()) and stored with a version
+    number in private.table_metadata. get() serves it from an in-process
+    LRU of max_tables (TABLE_METADATA_CACHE_SIZE) entries; an entry is
+    revalidated against the stored version at most every ttl seconds
+    (TABLE_METADATA_TTL), so a refresh made by another worker is picked up
+    within ttl and one made by this worker immediately. Tables ingested
+    before the cache existed get their metadata built on first use.
+    """
+
+    def __init__(self, connect=None, max_tables=None, ttl=None, sample_size=3):
+        self.connect = connect or self._connect
+        self.max_tables = max_tables or int(os.getenv("TABLE_METADATA_CACHE_SIZE", 256))
+        self.ttl = (
+            ttl if ttl is not None else float(os.getenv("TABLE_METADATA_TTL", 30))
+        )
+        self.sample_size = sample_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    @staticmethod
+    def _connect():
+        parsed = urlparse(os.getenv("CONNECTION_URL"))
+        return psycopg2.connect(
+            host=parsed.hostname,
+            port=parsed.port or 5432,
+            user=parsed.username,
+            password=parsed.password,
+            database=parsed.path.lstrip("/"),
+            cursor_factory=TimedCursor,
+        )
+
+    def _ensure_table(self, cursor):
+        if self._table_ready:
+            return
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS private.table_metadata (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                metadata JSONB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+
+    def build(self, cursor, table_name):
+        """Reads the metadata of table_name, or None if it has no columns"""
+        cursor.execute(
+            """
+            SELECT column_name, data_type, is_nullable, column_default, character_maximum_length
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+            AND table_name = %s
+            ORDER BY ordinal_position
+            """,
+            (table_name,),
+        )
+        columns = [
+            {
+                "name": row[0],
+                "type": row[1],
+                "nullable": row[2],
+                "default": row[3],
+                "length": row[4],
+            }
+            for row in cursor.fetchall()
+        ]
+        if not columns:
+            return None
+
+        cursor.execute(f'SELECT * FROM "{table_name}" LIMIT %s', (self.sample_size,))
+        sample_rows = [
+            {
+                column["name"]: (str(value) if value is not None else None)
+                for column, value in zip(columns, row)
+            }
+            for row in cursor.fetchall()
+        ]
+        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
+        return {
+            "table_name": table_name,
+            "columns": columns,
+            "sample_rows": sample_rows,
+            "row_count": cursor.fetchone()[0],
+        }
+
+    def refresh(self, table_name):
+        """
+        Rebuilds and stores the metadata of table_name under a new version.
+        Called after the table is created or its rows change; errors are
+        logged, the next get() then rebuilds.
+        """
+        connection = None
+        try:
+            connection = self.connect()
+            cursor = connection.cursor()
+            self._ensure_table(cursor)
+            metadata = self.build(cursor, table_name)
+            if metadata is None:
+                cursor.execute(
+                    "DELETE FROM private.table_metadata WHERE table_name = %s",
+                    (table_name,),
+                )
+                connection.commit()
+                self.invalidate(table_name)
+                return None
+
+            cursor.execute(
+                """
+                INSERT INTO private.table_metadata (table_name, version, metadata, updated_at)
+                VALUES (%s, 1, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (table_name) DO UPDATE SET
+                    version = private.table_metadata.version + 1,
+                    metadata = excluded.metadata,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING version
+                """,
+                (table_name, json.dumps(metadata, default=str)),
+            )
+            version = cursor.fetchone()[0]
+            connection.commit()
+            self._table_ready = True
+            cursor.close()
+            self._remember(table_name, version, metadata)
+            return metadata
+        except Exception as e:
+            if connection is not None:
+                connection.rollback()
+            print(f"Error refreshing metadata of {table_name}: {str(e)}")
+            return None
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def get(self, table_name):
+        """Metadata of table_name, or None if the table does not exist"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if entry and now - entry["checked_at"] < self.ttl:
+                self._entries.move_to_end(table_name)
+                return entry["metadata"]
+
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            self._ensure_table(cursor)
+            if entry:
+                cursor.execute(
+                    "SELECT version FROM private.table_metadata WHERE table_name = %s",
+                    (table_name,),
+                )
+                row = cursor.fetchone()
+                if row and row[0] == entry["version"]:
+                    with self._lock:
+                        entry["checked_at"] = now
+                    connection.commit()
+                    return entry["metadata"]
+
+            cursor.execute(
+                "SELECT version, metadata FROM private.table_metadata WHERE table_name = %s",
+                (table_name,),
+            )
+            row = cursor.fetchone()
+            connection.commit()
+            self._table_ready = True
+            cursor.close()
+        finally:
+            connection.close()
+
+        if not row:
+            return self.refresh(table_name)
+        version, metadata = row
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        self._remember(table_name, version, metadata)
+        return metadata
+
+    def version(self, table_name):
+        """Current metadata version of table_name, None for an unknown table"""
+        self.get(table_name)
+        with self._lock:
+            entry = self._entries.get(table_name)
+            return entry["version"] if entry else None
+
+    def invalidate(self, table_name):
+        with self._lock:
+            self._entries.pop(table_name, None)
+
+    def _remember(self, table_name, version, metadata):
+        with self._lock:
+            self._entries[table_name] = {
+                "version": version,
+                "metadata": metadata,
+                "checked_at": time.monotonic(),
+            }
+            self._entries.move_to_end(table_name)
+            while len(self._entries) > self.max_tables:
+                self._entries.popitem(last=False)
+
+    def schema_info(self, table_name):
+        """Schema as prompt lines "- column (type)", None for an unknown table"""
+        metadata = self.get(table_name)
+        if not metadata:
+            return None
+        return "\n".join(
+            f"- {column['name']} ({column['type']})" for column in metadata["columns"]
+        )
+
+    def column_names(self, table_name):
+        metadata = self.get(table_name)
+        return [column["name"] for column in metadata["columns"]] if metadata else []
+
+
+table_metadata = TableMetadataCache()